@@ -1,27 +1,59 @@
 """
 AI Agent Service for EchoSense
-Uses LangChain with OpenAI GPT for generating context-aware brand responses.
+Uses the OpenAI async client for generating context-aware brand responses.
 """
 
 import asyncio
 import logging
+import re
 import uuid
 from datetime import datetime
 from typing import Dict, List, Any, Optional
 
 import aiosqlite
-from langchain.llms.openai import OpenAI
-from langchain.prompts import PromptTemplate
-from langchain.chains import LLMChain
-from langchain.schema import BaseOutputParser
 import openai
 
 from .config import settings
+from .database import open_connection
 
 logger = logging.getLogger(__name__)
 
+LLM_MODEL = "gpt-3.5-turbo"
 
-class ResponseQualityParser(BaseOutputParser):
+RESPONSE_PROMPT = """
+You are a professional brand representative for {brand}. A customer has posted the following content on {source}:
+
+"{post_content}"
+
+The sentiment of this post is: {sentiment}
+
+Generate a professional, empathetic, and constructive response that:
+1. Acknowledges the customer's feedback
+2. Shows that the brand cares about customer experience
+3. Offers a path forward or solution when appropriate
+4. Maintains a positive and professional tone
+5. Is concise (under 100 words)
+
+Response:
+"""
+
+QUALITY_PROMPT = """
+Evaluate the quality of this brand response on a scale of 0.0 to 1.0:
+
+"{response}"
+
+Consider:
+- Professional tone
+- Empathy and understanding
+- Constructive approach
+- Appropriate length
+- Brand-appropriate language
+
+Quality Score (0.0-1.0):
+"""
+
+
+class ResponseQualityParser:
     """Parser for evaluating response quality."""
     
     def parse(self, text: str) -> Dict[str, Any]:
@@ -62,10 +94,16 @@ class AIAgentService:
     """Service for generating AI-powered brand responses."""
     
     def __init__(self):
-        self.llm: Optional[OpenAI] = None
-        self.response_chain: Optional[LLMChain] = None
-        self.quality_chain: Optional[LLMChain] = None
+        self.client: Optional[openai.AsyncOpenAI] = None
+        self.quality_parser = ResponseQualityParser()
+        self.generation_semaphore = asyncio.Semaphore(settings.ai_max_concurrency or 16)
         self.db_path = "echosense.db"
+        self.db: Optional[aiosqlite.Connection] = None
+        self.db_lock = asyncio.Lock()
+        self.brand_lookup: Dict[str, str] = {
+            brand.lower(): brand for brand in settings.target_brands_list
+        }
+        self.brand_pattern = self._build_brand_pattern()
         self.fallback_responses = [
             "Thank you for your feedback. We're always working to improve our products and services.",
             "We appreciate you taking the time to share your thoughts. Your input helps us grow.",
@@ -78,70 +116,11 @@ class AIAgentService:
         """Initialize the AI agent service."""
         logger.info("Initializing AI Agent Service...")
         
+        await self.get_db()
+        
         try:
-            # Initialize OpenAI client
-            openai.api_key = settings.openai_api_key
-            
-            # Initialize LangChain LLM
-            self.llm = OpenAI(
-                openai_api_key=settings.openai_api_key,
-                temperature=0.7,
-                max_tokens=200,
-                model_name="gpt-3.5-turbo-instruct"
-            )
-            
-            # Create response generation chain
-            response_prompt = PromptTemplate(
-                input_variables=["brand", "post_content", "sentiment", "source"],
-                template="""
-You are a professional brand representative for {brand}. A customer has posted the following content on {source}:
-
-"{post_content}"
-
-The sentiment of this post is: {sentiment}
-
-Generate a professional, empathetic, and constructive response that:
-1. Acknowledges the customer's feedback
-2. Shows that the brand cares about customer experience
-3. Offers a path forward or solution when appropriate
-4. Maintains a positive and professional tone
-5. Is concise (under 100 words)
-
-Response:
-"""
-            )
-            
-            self.response_chain = LLMChain(
-                llm=self.llm,
-                prompt=response_prompt,
-                verbose=False
-            )
-            
-            # Create quality evaluation chain
-            quality_prompt = PromptTemplate(
-                input_variables=["response"],
-                template="""
-Evaluate the quality of this brand response on a scale of 0.0 to 1.0:
-
-"{response}"
-
-Consider:
-- Professional tone
-- Empathy and understanding
-- Constructive approach
-- Appropriate length
-- Brand-appropriate language
-
-Quality Score (0.0-1.0):
-"""
-            )
-            
-            self.quality_chain = LLMChain(
-                llm=self.llm,
-                prompt=quality_prompt,
-                output_parser=ResponseQualityParser(),
-                verbose=False
-            )
+            # Initialize async OpenAI client
+            self.client = openai.AsyncOpenAI(api_key=settings.openai_api_key)
             
             logger.info("AI Agent Service initialized successfully")
             
@@ -150,25 +129,27 @@ Quality Score (0.0-1.0):
             logger.warning("AI Agent will use fallback responses")
     
     async def generate_response(self, post: Dict[str, Any]) -> Dict[str, Any]:
-        """Generate an AI response for a single post."""
+        """Generate an AI response for a single post (not persisted, see store_responses)."""
+        async with self.generation_semaphore:
+            return await self._generate_response(post)
+    
+    async def _generate_response(self, post: Dict[str, Any]) -> Dict[str, Any]:
+        """Generate a response without holding the concurrency limit."""
         try:
-            if not self.response_chain:
+            if not self.client:
                 return await self.generate_fallback_response(post)
             
             # Determine primary brand mentioned
             brand = self.extract_brand_from_post(post['content'])
             
             # Generate response
-            response_text = await asyncio.get_event_loop().run_in_executor(
-                None,
-                self.response_chain.run,
-                {
-                    'brand': brand,
-                    'post_content': post['content'][:500],  # Limit content length
-                    'sentiment': post.get('sentiment', 'neutral'),
-                    'source': post['source']
-                }
-            )
+            prompt = RESPONSE_PROMPT.format_map({
+                'brand': brand,
+                'post_content': post['content'][:500],  # Limit content length
+                'sentiment': post.get('sentiment', 'neutral'),
+                'source': post['source']
+            })
+            response_text = await self.complete(prompt)
             
             # Clean up response
             response_text = response_text.strip()
@@ -186,9 +167,6 @@ Quality Score (0.0-1.0):
                 'generated_by': 'ai'
             }
             
-            # Store response in database
-            await self.store_response(response_data)
-            
             return response_data
             
         except Exception as e:
@@ -211,34 +189,51 @@ Quality Score (0.0-1.0):
             'generated_by': 'fallback'
         }
         
-        await self.store_response(response_data)
         return response_data
     
     async def evaluate_response_quality(self, response: str) -> Dict[str, Any]:
         """Evaluate the quality of a generated response."""
+        if not settings.use_llm_quality_judge:
+            # Heuristic scoring of the response text itself, no LLM round-trip
+            return self.quality_parser.parse(response)
+        
         try:
-            if not self.quality_chain:
+            if not self.client:
                 return {'quality_score': 0.6, 'analysis': 'Quality evaluation unavailable'}
             
-            quality_result = await asyncio.get_event_loop().run_in_executor(
-                None,
-                self.quality_chain.run,
-                {'response': response}
-            )
+            quality_text = await self.complete(QUALITY_PROMPT.format_map({'response': response}))
             
-            return quality_result
+            return self.quality_parser.parse(quality_text)
             
         except Exception as e:
             logger.error(f"Error evaluating response quality: {e}")
             return {'quality_score': 0.5, 'analysis': 'Error in quality evaluation'}
     
+    async def complete(self, prompt: str) -> str:
+        """Send a single-turn prompt to the chat completions API and return the text."""
+        completion = await self.client.chat.completions.create(
+            model=LLM_MODEL,
+            messages=[{'role': 'user', 'content': prompt}],
+            max_tokens=200,
+            temperature=0.7
+        )
+        return completion.choices[0].message.content or ""
+    
+    def _build_brand_pattern(self) -> Optional[re.Pattern]:
+        """Compile one case-insensitive, word-bounded alternation of all target brands."""
+        # Longest first so multi-word brands win over their prefixes
+        brands = sorted((brand for brand in self.brand_lookup if brand), key=len, reverse=True)
+        if not brands:
+            return None
+        
+        return re.compile(r"\b(" + "|".join(map(re.escape, brands)) + r")\b", re.IGNORECASE)
+    
     def extract_brand_from_post(self, content: str) -> str:
         """Extract the primary brand mentioned in the post."""
-        content_lower = content.lower()
-        
-        for brand in settings.target_brands_list:
-            if brand.lower() in content_lower:
-                return brand
+        if self.brand_pattern:
+            match = self.brand_pattern.search(content)
+            if match:
+                return self.brand_lookup[match.group(1).lower()]
         
         # Default to first brand if none specifically mentioned
         return settings.target_brands_list[0] if settings.target_brands_list else "Brand"
@@ -247,90 +242,110 @@ Quality Score (0.0-1.0):
         """Generate responses for multiple posts."""
         logger.info(f"Generating AI responses for {len(posts)} posts...")
         
-        tasks = []
-        for post in posts:
-            task = self.generate_response(post)
-            tasks.append(task)
+        # Concurrency is bounded by the semaphore inside generate_response
+        tasks = [self.generate_response(post) for post in posts]
         
-        # Generate responses concurrently
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        responses = []
+        for completed in asyncio.as_completed(tasks):
+            try:
+                responses.append(await completed)
+            except Exception as e:
+                logger.error(f"Error generating response: {e}")
         
-        successful_responses = 0
-        for i, result in enumerate(results):
-            if isinstance(result, Exception):
-                logger.error(f"Error generating response for post {i}: {result}")
-            else:
-                successful_responses += 1
+        # Persist all responses in a single transaction
+        await self.store_responses(responses)
         
-        logger.info(f"Successfully generated {successful_responses} AI responses")
+        logger.info(f"Successfully generated {len(responses)} AI responses")
+    
+    async def get_db(self) -> aiosqlite.Connection:
+        """Return the shared database connection, opening it on first use."""
+        async with self.db_lock:
+            if self.db is None:
+                self.db = await open_connection(self.db_path)
+        return self.db
     
     async def store_response(self, response_data: Dict[str, Any]):
-        """Store AI response in the database."""
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute("""
-                INSERT INTO ai_responses 
-                (id, response, target_post_id, quality_score, timestamp)
-                VALUES (?, ?, ?, ?, ?)
-            """, (
+        """Store a single AI response in the database."""
+        await self.store_responses([response_data])
+
+    async def store_responses(self, responses: List[Dict[str, Any]]):
+        """Store AI responses in the database in one transaction."""
+        if not responses:
+            return
+        
+        db = await self.get_db()
+        await db.executemany("""
+            INSERT INTO ai_responses 
+            (id, response, target_post_id, quality_score, timestamp)
+            VALUES (?, ?, ?, ?, ?)
+        """, [
+            (
                 response_data['id'],
                 response_data['response'],
                 response_data['target_post_id'],
                 response_data['quality_score'],
                 response_data['timestamp']
-            ))
-            await db.commit()
-    
+            )
+            for response_data in responses
+        ])
+        await db.commit()
+
     async def get_recent_responses(self, limit: int = 10) -> List[Dict[str, Any]]:
         """Get recent AI responses."""
-        async with aiosqlite.connect(self.db_path) as db:
-            cursor = await db.execute("""
-                SELECT id, response, target_post_id, quality_score, timestamp
-                FROM ai_responses 
-                ORDER BY timestamp DESC 
-                LIMIT ?
-            """, (limit,))
-            
-            rows = await cursor.fetchall()
-            
-            responses = []
-            for row in rows:
-                responses.append({
-                    'id': row[0],
-                    'response': row[1],
-                    'target_post': row[2],
-                    'quality_score': row[3],
-                    'timestamp': datetime.fromisoformat(row[4]) if isinstance(row[4], str) else row[4]
-                })
-            
-            return responses
-    
+        db = await self.get_db()
+        cursor = await db.execute("""
+            SELECT id, response, target_post_id, quality_score, timestamp
+            FROM ai_responses 
+            ORDER BY timestamp DESC 
+            LIMIT ?
+        """, (limit,))
+        
+        rows = await cursor.fetchall()
+        
+        # Timestamps stay ISO strings; AIResponse parses them during validation
+        responses = []
+        for row in rows:
+            responses.append({
+                'id': row[0],
+                'response': row[1],
+                'target_post': row[2],
+                'quality_score': row[3],
+                'timestamp': row[4]
+            })
+        
+        return responses
+
     async def get_response_analytics(self) -> Dict[str, Any]:
         """Get analytics about AI responses."""
-        async with aiosqlite.connect(self.db_path) as db:
-            # Get total responses
-            cursor = await db.execute("SELECT COUNT(*) FROM ai_responses")
-            total_responses = (await cursor.fetchone())[0]
-            
-            # Get average quality score
-            cursor = await db.execute("SELECT AVG(quality_score) FROM ai_responses")
-            avg_quality = (await cursor.fetchone())[0] or 0.0
-            
-            # Get responses in last 24 hours
-            cursor = await db.execute("""
-                SELECT COUNT(*) FROM ai_responses 
-                WHERE timestamp > datetime('now', '-24 hours')
-            """)
-            recent_responses = (await cursor.fetchone())[0]
-            
-            return {
-                'total_responses': total_responses,
-                'average_quality_score': round(avg_quality, 2),
-                'responses_last_24h': recent_responses
-            }
-    
+        db = await self.get_db()
+        
+        # Get total responses
+        cursor = await db.execute("SELECT COUNT(*) FROM ai_responses")
+        total_responses = (await cursor.fetchone())[0]
+        
+        # Get average quality score
+        cursor = await db.execute("SELECT AVG(quality_score) FROM ai_responses")
+        avg_quality = (await cursor.fetchone())[0] or 0.0
+        
+        # Get responses in last 24 hours
+        cursor = await db.execute("""
+            SELECT COUNT(*) FROM ai_responses 
+            WHERE timestamp > datetime('now', '-24 hours')
+        """)
+        recent_responses = (await cursor.fetchone())[0]
+        
+        return {
+            'total_responses': total_responses,
+            'average_quality_score': round(avg_quality, 2),
+            'responses_last_24h': recent_responses
+        }
+
     async def cleanup(self):
         """Cleanup resources."""
-        self.llm = None
-        self.response_chain = None
-        self.quality_chain = None
+        if self.client:
+            await self.client.close()
+            self.client = None
+        if self.db:
+            await self.db.close()
+            self.db = None
         logger.info("AI Agent Service cleaned up")
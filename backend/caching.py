@@ -0,0 +1,178 @@
+"""
+Caching utilities for EchoSense
+Bounded in-memory caches for repeated inference results, read queries and seen content.
+"""
+
+import asyncio
+import hashlib
+import math
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+
+def text_key(text: str) -> bytes:
+    """Fast fixed-size key for a piece of text."""
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+class LRUCache:
+    """Least-recently-used cache with hit-rate tracking.
+
+    Only touched from the event loop thread, so no locking is needed.
+    """
+
+    def __init__(self, maxsize: int = 10_000):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value or None, refreshing its recency."""
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any):
+        """Store a value, evicting the least recently used entry when full."""
+        if self.maxsize <= 0:
+            return
+
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self):
+        """Drop all entries and reset counters."""
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Size and hit-rate figures for monitoring."""
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+class TTLCache:
+    """Short-lived cache for async read queries.
+
+    Entries expire after ``ttl`` seconds. Concurrent misses on the same key
+    share one computation, and ``clear()`` also discards results of
+    computations that were already running, so writes are never masked by
+    data read before them.
+    """
+
+    def __init__(self, ttl: float = 5.0, maxsize: int = 64):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: Dict[Hashable, Tuple[float, Any]] = {}
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    async def get_or_compute(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the cached value for ``key`` or await ``compute()`` to fill it."""
+        if self.ttl <= 0:
+            return await compute()
+
+        entry = self._data.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self.hits += 1
+            return entry[1]
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.misses += 1
+            task = asyncio.ensure_future(compute())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done, generation=self._generation: self._store(key, done, generation))
+        else:
+            self.hits += 1
+
+        return await asyncio.shield(task)
+
+    def _store(self, key: Hashable, task: asyncio.Task, generation: int):
+        """Keep a finished computation's result unless the cache was cleared meanwhile."""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if task.cancelled() or task.exception() is not None or generation != self._generation:
+            return
+
+        self._data.pop(key, None)
+        self._data[key] = (time.monotonic() + self.ttl, task.result())
+        while len(self._data) > self.maxsize:
+            self._data.pop(next(iter(self._data)))
+
+    def clear(self):
+        """Invalidate every entry, including computations still in flight."""
+        self._data.clear()
+        self._inflight.clear()
+        self._generation += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Size and hit-rate figures for monitoring."""
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over ``text_key`` digests.
+
+    Membership answers are "definitely not seen" or "possibly seen"; callers
+    confirm the latter against the database. Bit positions come from double
+    hashing the two 64-bit halves of the digest, so keys must be at least
+    16 uniformly distributed bytes.
+    """
+
+    def __init__(self, capacity: int = 1_000_000, error_rate: float = 0.001):
+        self.capacity = max(1, capacity)
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / self.capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: bytes) -> List[int]:
+        h1 = int.from_bytes(key[:8], "little")
+        h2 = int.from_bytes(key[8:16], "little") | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, key: bytes):
+        """Record a digest as seen."""
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: bytes) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    def stats(self) -> Dict[str, Any]:
+        """Sizing figures for monitoring."""
+        return {
+            'count': self.count,
+            'capacity': self.capacity,
+            'num_bits': self.num_bits,
+            'num_hashes': self.num_hashes
+        }
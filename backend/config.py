@@ -1,97 +1,147 @@
 """
 Configuration management for EchoSense backend.
-Uses Pydantic for type validation and environment variable handling.
+Plain frozen dataclass populated from the environment and an optional .env file.
 """
 
 import os
-from typing import List, Optional
+from dataclasses import MISSING, dataclass, field, fields
+from functools import cached_property, lru_cache
+from typing import Any, Dict, List, Tuple
 
-from pydantic import Field
-from pydantic_settings import BaseSettings
+from dotenv import dotenv_values
 
+ENV_FILE = ".env"
+TRUE_VALUES = frozenset({"1", "true", "t", "yes", "y", "on"})
+FALSE_VALUES = frozenset({"0", "false", "f", "no", "n", "off"})
 
-class Settings(BaseSettings):
+# Padded sequence lengths shared by the transformer services, so compiled kernels
+# are reused across batches
+SEQUENCE_BUCKETS = (32, 64, 128, 256, 512)
+
+
+def setting(default: Any = MISSING, description: str = ""):
+    """Declare a setting; settings without a default must be provided by the environment."""
+    return field(default=default, metadata={"description": description})
+
+
+@dataclass(frozen=True, kw_only=True)
+class Settings:
     """Application settings with environment variable support."""
     
     # Server Configuration
-    backend_port: int = Field(default=8000, description="Backend server port")
-    frontend_port: int = Field(default=3000, description="Frontend server port")
-    environment: str = Field(default="development", description="Environment (development/production)")
-    log_level: str = Field(default="INFO", description="Logging level")
-    demo_mode: bool = Field(default=True, description="Enable demo mode")
+    backend_port: int = setting(default=8000, description="Backend server port")
+    frontend_port: int = setting(default=3000, description="Frontend server port")
+    environment: str = setting(default="development", description="Environment (development/production)")
+    log_level: str = setting(default="INFO", description="Logging level")
+    access_log: bool = setting(default=False, description="Log every HTTP request")
+    workers: int = setting(
+        default=1,
+        description="Server worker processes outside development; background monitoring runs in only one"
+    )
+    demo_mode: bool = setting(default=True, description="Enable demo mode")
     
     # Database Configuration
-    database_url: str = Field(default="sqlite:///./echosense.db", description="Database connection URL")
+    database_url: str = setting(default="sqlite:///./echosense.db", description="Database connection URL")
     
     # Reddit API Configuration
-    reddit_client_id: str = Field(description="Reddit API client ID")
-    reddit_client_secret: str = Field(description="Reddit API client secret")
-    reddit_user_agent: str = Field(description="Reddit API user agent")
+    reddit_client_id: str = setting(description="Reddit API client ID")
+    reddit_client_secret: str = setting(description="Reddit API client secret")
+    reddit_user_agent: str = setting(description="Reddit API user agent")
     
     # News API Configuration
-    news_api_key: str = Field(description="NewsAPI key")
+    news_api_key: str = setting(description="NewsAPI key")
     
     # YouTube API Configuration
-    youtube_api_key: str = Field(description="YouTube Data API key")
+    youtube_api_key: str = setting(description="YouTube Data API key")
     
     # OpenAI API Configuration
-    openai_api_key: str = Field(description="OpenAI API key")
+    openai_api_key: str = setting(description="OpenAI API key")
     
     # Brand Configuration
-    target_brand: str = Field(default="Tesla,Zuntra", description="Target brands to monitor")
-    subreddits: str = Field(default="technology,news,cars", description="Subreddits to monitor")
-    news_keywords: str = Field(default="Tesla,electric vehicle", description="News keywords to search")
+    target_brand: str = setting(default="Tesla,Zuntra", description="Target brands to monitor")
+    subreddits: str = setting(default="technology,news,cars", description="Subreddits to monitor")
+    news_keywords: str = setting(default="Tesla,electric vehicle", description="News keywords to search")
     
     # Data Collection Configuration
-    collection_interval: int = Field(default=120, description="Data collection interval in seconds")
-    max_posts_per_source: int = Field(default=50, description="Maximum posts to collect per source")
+    collection_interval: int = setting(default=120, description="Data collection interval in seconds")
+    max_posts_per_source: int = setting(default=50, description="Maximum posts to collect per source")
+    max_content_chars: int = setting(default=4096, description="Collected post text is truncated to this many characters")
+    collection_concurrency: int = setting(
+        default=4,
+        description="Maximum concurrent API requests across subreddits, brands and keywords"
+    )
+    dedup_filter_capacity: int = setting(
+        default=1_000_000,
+        description="Stored posts the duplicate-content Bloom filter is sized for"
+    )
     
     # Sentiment Analysis Configuration
-    sentiment_model: str = Field(
+    sentiment_model: str = setting(
         default="distilbert-base-uncased-finetuned-sst-2-english",
         description="Hugging Face sentiment model"
     )
-    batch_size: int = Field(default=32, description="Batch size for sentiment analysis")
-    use_gpu: bool = Field(default=False, description="Use GPU for sentiment analysis")
+    batch_size: int = setting(default=32, description="Batch size for sentiment analysis")
+    use_gpu: bool = setting(default=False, description="Use GPU for sentiment analysis")
+    language_model_path: str = setting(default="lid.176.ftz", description="fastText language identification model")
+    sentiment_precision: str = setting(
+        default="fp32",
+        description="Inference precision for transformer models (fp32/bf16/int8, or auto for int8 on CPU and bf16 on GPU)"
+    )
+    max_sequence_length: int = setting(default=128, description="Token limit for transformer inputs")
+    use_onnx: bool = setting(default=False, description="Use quantized ONNX Runtime models for CPU inference")
+    onnx_cache_dir: str = setting(default=".onnx_cache", description="Directory for exported ONNX models")
+    use_compile: bool = setting(default=False, description="Compile transformer models with torch.compile")
+    infer_workers: int = setting(default=2, description="Threads dedicated to model inference")
+    torch_threads: int = setting(default=0, description="PyTorch intra-op threads (0 keeps PyTorch's default)")
+    inference_cache_size: int = setting(default=10_000, description="Entries kept per inference result cache")
+    max_batch_size: int = setting(default=32, description="Maximum texts coalesced into one inference call")
+    max_latency_ms: int = setting(default=10, description="Maximum wait for a micro-batch to fill, in milliseconds")
+    
+    # API Configuration
+    read_cache_ttl: float = setting(default=5.0, description="Seconds dashboard read queries are cached for (0 disables)")
     
     # Forecasting Configuration
-    forecast_hours: int = Field(default=48, description="Forecast horizon in hours")
-    confidence_interval: float = Field(default=0.8, description="Confidence interval for forecasts")
+    forecast_hours: int = setting(default=48, description="Forecast horizon in hours")
+    confidence_interval: float = setting(default=0.8, description="Confidence interval for forecasts")
+    forecast_cache_ttl: float = setting(default=600.0, description="Seconds a generated forecast is served from cache")
+    
+    # Topic Modeling Configuration
+    topic_cache_ttl: float = setting(
+        default=300.0,
+        description="Seconds extracted topics are reused while the posts in the window are unchanged"
+    )
     
     # Authentication Configuration
-    nextauth_secret: str = Field(description="NextAuth secret key")
-    nextauth_url: str = Field(default="http://localhost:3000", description="NextAuth URL")
+    nextauth_secret: str = setting(description="NextAuth secret key")
+    nextauth_url: str = setting(default="http://localhost:3000", description="NextAuth URL")
     
     # Email Configuration
-    email_server_host: str = Field(default="smtp.gmail.com", description="Email server host")
-    email_server_port: int = Field(default=587, description="Email server port")
-    email_server_user: str = Field(description="Email server username")
-    email_server_password: str = Field(description="Email server password")
-    email_from: str = Field(description="Email from address")
+    email_server_host: str = setting(default="smtp.gmail.com", description="Email server host")
+    email_server_port: int = setting(default=587, description="Email server port")
+    email_server_user: str = setting(description="Email server username")
+    email_server_password: str = setting(description="Email server password")
+    email_from: str = setting(description="Email from address")
     
     # LLM Configuration
-    llm_provider: str = Field(default="openai", description="LLM provider")
-    llm_api_key: str = Field(description="LLM API key")
-    
-    class Config:
-        env_file = ".env"
-        env_file_encoding = "utf-8"
-        case_sensitive = False
-    
-    @property
-    def target_brands_list(self) -> List[str]:
-        """Get target brands as a list."""
-        return [brand.strip() for brand in self.target_brand.split(",")]
-    
-    @property
-    def subreddits_list(self) -> List[str]:
-        """Get subreddits as a list."""
-        return [sub.strip() for sub in self.subreddits.split(",")]
-    
-    @property
-    def news_keywords_list(self) -> List[str]:
-        """Get news keywords as a list."""
-        return [keyword.strip() for keyword in self.news_keywords.split(",")]
+    llm_provider: str = setting(default="openai", description="LLM provider")
+    llm_api_key: str = setting(description="LLM API key")
+    ai_max_concurrency: int = setting(default=16, description="Maximum concurrent AI response generations")
+    use_llm_quality_judge: bool = setting(default=False, description="Score AI responses with a second LLM call")
+    
+    @cached_property
+    def target_brands_list(self) -> Tuple[str, ...]:
+        """Get target brands as a tuple, parsed once on first access."""
+        return tuple(brand.strip() for brand in self.target_brand.split(","))
+    
+    @cached_property
+    def subreddits_list(self) -> Tuple[str, ...]:
+        """Get subreddits as a tuple, parsed once on first access."""
+        return tuple(sub.strip() for sub in self.subreddits.split(","))
+    
+    @cached_property
+    def news_keywords_list(self) -> Tuple[str, ...]:
+        """Get news keywords as a tuple, parsed once on first access."""
+        return tuple(keyword.strip() for keyword in self.news_keywords.split(","))
     
     @property
     def cors_origins(self) -> List[str]:
@@ -104,5 +154,54 @@ class Settings(BaseSettings):
         ]
 
 
-# Global settings instance
-settings = Settings()
+def _coerce(name: str, value: str, target: type) -> Any:
+    """Convert a raw environment string to the declared field type."""
+    if target is bool:
+        lowered = value.strip().lower()
+        if lowered in TRUE_VALUES:
+            return True
+        if lowered in FALSE_VALUES:
+            return False
+        raise ValueError(f"Setting {name} expects a boolean, got {value!r}")
+    if target in (int, float):
+        try:
+            return target(value)
+        except ValueError:
+            raise ValueError(f"Setting {name} expects {target.__name__}, got {value!r}") from None
+    return value
+
+
+def load_settings(env_file: str = ENV_FILE) -> Settings:
+    """Read settings from the .env file and environment (environment wins, names are case-insensitive)."""
+    raw: Dict[str, str] = {}
+    if os.path.exists(env_file):
+        raw.update({key.lower(): value for key, value in dotenv_values(env_file).items() if value is not None})
+    raw.update({key.lower(): value for key, value in os.environ.items()})
+
+    values: Dict[str, Any] = {}
+    missing: List[str] = []
+    for spec in fields(Settings):
+        if spec.name in raw:
+            values[spec.name] = _coerce(spec.name, raw[spec.name], spec.type)
+        elif spec.default is MISSING:
+            missing.append(spec.name.upper())
+
+    if missing:
+        raise ValueError(f"Missing required settings: {', '.join(missing)}")
+
+    return Settings(**values)
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Build the global settings instance on first use."""
+    return load_settings()
+
+
+def __getattr__(name: str):
+    """Construct ``settings`` lazily on first access (PEP 562)."""
+    if name == "settings":
+        instance = get_settings()
+        globals()["settings"] = instance
+        return instance
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -4,38 +4,131 @@ Real-time anomaly detection and alert system for brand perception monitoring.
 """
 
 import asyncio
+import json
 import logging
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
-import statistics
-import uuid
-import aiosqlite
+from types import MappingProxyType
+from typing import Callable, Dict, List, Any, Optional, Tuple
+from statistics import fmean
+import secrets
 
 from .config import settings
+from .database import connect, epoch_seconds
 
 logger = logging.getLogger(__name__)
 
+# Alert thresholds
+NEGATIVE_SPIKE_THRESHOLD = -15.0   # % change in negative sentiment
+POSITIVE_SPIKE_THRESHOLD = 20.0    # % change in positive sentiment
+SENTIMENT_WINDOW_HOURS = 2
+VOLUME_SURGE_MULTIPLIER = 3.0      # 3x normal volume
+VOLUME_WINDOW_HOURS = 1
+ENGAGEMENT_MULTIPLIER = 2.5        # 2.5x normal engagement
+ENGAGEMENT_WINDOW_HOURS = 1
+
+# Read-only view of the thresholds above, grouped by alert type
+ALERT_THRESHOLDS = MappingProxyType({
+    'sentiment_spike': MappingProxyType({
+        'negative_threshold': NEGATIVE_SPIKE_THRESHOLD,
+        'positive_threshold': POSITIVE_SPIKE_THRESHOLD,
+        'time_window': SENTIMENT_WINDOW_HOURS
+    }),
+    'volume_surge': MappingProxyType({
+        'threshold_multiplier': VOLUME_SURGE_MULTIPLIER,
+        'time_window': VOLUME_WINDOW_HOURS
+    }),
+    'engagement_anomaly': MappingProxyType({
+        'threshold_multiplier': ENGAGEMENT_MULTIPLIER,
+        'time_window': ENGAGEMENT_WINDOW_HOURS
+    })
+})
+
+# SQL kept as module constants so every call reuses the same statement text
+_SQL_CREATE_ALERTS = """
+    CREATE TABLE IF NOT EXISTS alerts (
+        id TEXT PRIMARY KEY,
+        type TEXT NOT NULL,
+        severity TEXT NOT NULL,
+        title TEXT NOT NULL,
+        description TEXT NOT NULL,
+        timestamp DATETIME NOT NULL,
+        value REAL,
+        threshold REAL,
+        source TEXT,
+        acknowledged BOOLEAN DEFAULT FALSE,
+        resolved BOOLEAN DEFAULT FALSE,
+        metadata TEXT
+    )
+"""
+
+_SQL_ALERT_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_alerts_timestamp ON alerts(timestamp)",
+    "CREATE INDEX IF NOT EXISTS idx_alerts_severity ON alerts(severity)",
+    "CREATE INDEX IF NOT EXISTS idx_alerts_acknowledged ON alerts(acknowledged)",
+)
+
+# Current and baseline counts per sentiment in one scan of the posts table.
+# "GROUP BY +sentiment" stops the planner from skip-scanning idx_posts_sent_epoch
+# across every sentiment value just to avoid sorting three groups; it range-scans
+# idx_posts_epoch_sent instead.
+# Window bounds are UNIX seconds compared against posts.ts_epoch.
+_SQL_SENTIMENT_WINDOWS = """
+    SELECT sentiment,
+        SUM(CASE WHEN ts_epoch > :current_start THEN 1 ELSE 0 END) AS current_count,
+        SUM(CASE WHEN ts_epoch BETWEEN :baseline_start AND :baseline_end THEN 1 ELSE 0 END) AS baseline_count
+    FROM posts 
+    WHERE ts_epoch >= :baseline_start AND sentiment IS NOT NULL
+    GROUP BY +sentiment
+"""
+
+_SQL_LATEST_POST = "SELECT MAX(ts_epoch) FROM posts"
+
+_SQL_CURRENT_VOLUME = """
+    SELECT COUNT(*) FROM posts 
+    WHERE ts_epoch >= ?
+"""
+
+_SQL_HOURLY_VOLUME_HISTORY = """
+    SELECT ts_epoch / 86400 AS day, COUNT(*)
+    FROM posts 
+    WHERE ts_epoch >= ? AND ts_epoch < ?
+    AND ts_epoch / 3600 % 24 = ?
+    GROUP BY day
+"""
+
+_SQL_INSERT_ALERT = """
+    INSERT INTO alerts 
+    (id, type, severity, title, description, timestamp, value, threshold, source, metadata)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+_SQL_ACTIVE_ALERTS = """
+    SELECT id, type, severity, title, description, timestamp, value, threshold, source
+    FROM alerts 
+    WHERE acknowledged = FALSE
+    ORDER BY timestamp DESC 
+    LIMIT ?
+"""
+
+_SQL_ACKNOWLEDGE_ALERT = """
+    UPDATE alerts SET acknowledged = TRUE 
+    WHERE id = ?
+"""
+
 
 class CrisisDetectionService:
     """Service for detecting brand perception crises and anomalies."""
     
     def __init__(self):
         self.db_path = "echosense.db"
-        self.alert_thresholds = {
-            'sentiment_spike': {
-                'negative_threshold': -15.0,  # % change in negative sentiment
-                'positive_threshold': 20.0,   # % change in positive sentiment
-                'time_window': 2  # hours
-            },
-            'volume_surge': {
-                'threshold_multiplier': 3.0,  # 3x normal volume
-                'time_window': 1  # hours
-            },
-            'engagement_anomaly': {
-                'threshold_multiplier': 2.5,  # 2.5x normal engagement
-                'time_window': 1  # hours
-            }
-        }
+        # A plain sqlite3 connection owned by a single worker thread: every query
+        # runs there, and a detector's statements go over in one hop
+        self.db: Optional[sqlite3.Connection] = None
+        self.db_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="crisis-db")
+        self.alert_thresholds = ALERT_THRESHOLDS
+        self.last_seen_post_timestamp = None
         
     async def initialize(self):
         """Initialize crisis detection service."""
@@ -48,52 +141,52 @@ class CrisisDetectionService:
             logger.error(f"Failed to initialize Crisis Detection Service: {e}")
             raise
     
+    def get_db(self) -> sqlite3.Connection:
+        """Return the database connection, opening it on first use (database thread only)."""
+        if self.db is None:
+            self.db = connect(self.db_path)
+            self.db.row_factory = sqlite3.Row
+        return self.db
+    
+    async def run_db(self, fn: Callable[..., Any], *args) -> Any:
+        """Run a synchronous database function on the database thread."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.db_executor, fn, *args)
+    
     async def init_alerts_database(self):
         """Initialize alerts database table."""
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS alerts (
-                    id TEXT PRIMARY KEY,
-                    type TEXT NOT NULL,
-                    severity TEXT NOT NULL,
-                    title TEXT NOT NULL,
-                    description TEXT NOT NULL,
-                    timestamp DATETIME NOT NULL,
-                    value REAL,
-                    threshold REAL,
-                    source TEXT,
-                    acknowledged BOOLEAN DEFAULT FALSE,
-                    resolved BOOLEAN DEFAULT FALSE,
-                    metadata TEXT
-                )
-            """)
-            
-            await db.execute("CREATE INDEX IF NOT EXISTS idx_alerts_timestamp ON alerts(timestamp)")
-            await db.execute("CREATE INDEX IF NOT EXISTS idx_alerts_severity ON alerts(severity)")
-            await db.execute("CREATE INDEX IF NOT EXISTS idx_alerts_acknowledged ON alerts(acknowledged)")
-            
-            await db.commit()
+        await self.run_db(self._init_alerts_tables)
+    
+    def _init_alerts_tables(self):
+        """Create the alerts table and its indexes in one script."""
+        self.get_db().executescript(";".join((_SQL_CREATE_ALERTS, *_SQL_ALERT_INDEXES)))
     
     async def detect_anomalies(self) -> List[Dict[str, Any]]:
         """Detect various types of anomalies in brand perception data."""
         alerts = []
+        # One clock read per cycle so windows and alert timestamps agree
+        now = datetime.utcnow()
         
         try:
-            # Check for sentiment spikes
-            sentiment_alerts = await self.detect_sentiment_anomalies()
-            alerts.extend(sentiment_alerts)
+            # Skip the detector scans when no posts have arrived since the last cycle
+            latest_post = await self.run_db(self._fetch_latest_post_timestamp)
+            if latest_post is None or latest_post == self.last_seen_post_timestamp:
+                logger.debug("No new posts since last detection cycle")
+                return []
             
-            # Check for volume surges
-            volume_alerts = await self.detect_volume_anomalies()
+            # Sentiment spikes, volume surges and engagement anomalies are independent
+            sentiment_alerts, volume_alerts, engagement_alerts = await asyncio.gather(
+                self.detect_sentiment_anomalies(now),
+                self.detect_volume_anomalies(now),
+                self.detect_engagement_anomalies(now)
+            )
+            alerts.extend(sentiment_alerts)
             alerts.extend(volume_alerts)
-            
-            # Check for engagement anomalies
-            engagement_alerts = await self.detect_engagement_anomalies()
             alerts.extend(engagement_alerts)
             
-            # Store new alerts
-            for alert in alerts:
-                await self.store_alert(alert)
+            # Store new alerts in a single transaction
+            await self.store_alerts(alerts)
+            self.last_seen_post_timestamp = latest_post
             
             logger.info(f"Detected {len(alerts)} new anomalies")
             return alerts
@@ -102,162 +195,123 @@ class CrisisDetectionService:
             logger.error(f"Error detecting anomalies: {e}")
             return []
     
-    async def detect_sentiment_anomalies(self) -> List[Dict[str, Any]]:
+    async def detect_sentiment_anomalies(self, now: Optional[datetime] = None) -> List[Dict[str, Any]]:
         """Detect sudden changes in sentiment distribution."""
         alerts = []
+        now = now or datetime.utcnow()
         
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                # Get current sentiment distribution (last 2 hours)
-                current_window = datetime.utcnow() - timedelta(hours=2)
-                cursor = await db.execute("""
-                    SELECT sentiment, COUNT(*) as count
-                    FROM posts 
-                    WHERE timestamp > ? AND sentiment IS NOT NULL
-                    GROUP BY sentiment
-                """, (current_window,))
-                
-                current_data = await cursor.fetchall()
-                current_total = sum(count for _, count in current_data)
-                
-                if current_total < 10:  # Not enough data
-                    return alerts
-                
-                current_distribution = {
-                    sentiment: (count / current_total) * 100 
-                    for sentiment, count in current_data
-                }
-                
-                # Get baseline sentiment distribution (previous 24 hours, excluding last 2 hours)
-                baseline_start = datetime.utcnow() - timedelta(hours=26)
-                baseline_end = datetime.utcnow() - timedelta(hours=2)
-                
-                cursor = await db.execute("""
-                    SELECT sentiment, COUNT(*) as count
-                    FROM posts 
-                    WHERE timestamp BETWEEN ? AND ? AND sentiment IS NOT NULL
-                    GROUP BY sentiment
-                """, (baseline_start, baseline_end))
-                
-                baseline_data = await cursor.fetchall()
-                baseline_total = sum(count for _, count in baseline_data)
-                
-                if baseline_total < 50:  # Not enough baseline data
-                    return alerts
-                
-                baseline_distribution = {
-                    sentiment: (count / baseline_total) * 100 
-                    for sentiment, count in baseline_data
-                }
+            # Current window is the last 2 hours; baseline is the 24 hours before it
+            current_window = now - timedelta(hours=SENTIMENT_WINDOW_HOURS)
+            rows = await self.run_db(self._fetch_sentiment_windows, {
+                'current_start': epoch_seconds(current_window),
+                'baseline_start': epoch_seconds(current_window - timedelta(hours=24)),
+                'baseline_end': epoch_seconds(current_window)
+            })
+            current_total = sum(row['current_count'] for row in rows)
+            
+            if current_total < 10:  # Not enough data
+                return alerts
+            
+            baseline_total = sum(row['baseline_count'] for row in rows)
+            
+            if baseline_total < 50:  # Not enough baseline data
+                return alerts
+            
+            # Check for significant changes (neutral shifts never raise an alert)
+            counts = {row['sentiment']: row for row in rows}
+            for sentiment in ('positive', 'negative'):
+                row = counts.get(sentiment)
+                current_pct = row['current_count'] * 100 / current_total if row else 0
+                baseline_pct = row['baseline_count'] * 100 / baseline_total if row else 0
+                change = current_pct - baseline_pct
                 
-                # Check for significant changes
-                for sentiment in ['positive', 'negative', 'neutral']:
-                    current_pct = current_distribution.get(sentiment, 0)
-                    baseline_pct = baseline_distribution.get(sentiment, 0)
-                    change = current_pct - baseline_pct
-                    
-                    # Check for negative sentiment spike
-                    if sentiment == 'negative' and change > self.alert_thresholds['sentiment_spike']['negative_threshold']:
-                        alerts.append({
-                            'id': str(uuid.uuid4()),
-                            'type': 'sentiment_spike',
-                            'severity': 'high' if change > 25 else 'medium',
-                            'title': 'Negative Sentiment Spike Detected',
-                            'description': f'Negative sentiment increased by {change:.1f}% in the last 2 hours',
-                            'timestamp': datetime.utcnow(),
-                            'value': change,
-                            'threshold': self.alert_thresholds['sentiment_spike']['negative_threshold'],
-                            'source': 'All Sources',
-                            'metadata': {
-                                'current_negative_pct': current_pct,
-                                'baseline_negative_pct': baseline_pct,
-                                'sample_size': current_total
-                            }
-                        })
-                    
-                    # Check for positive sentiment spike (good news!)
-                    elif sentiment == 'positive' and change > self.alert_thresholds['sentiment_spike']['positive_threshold']:
-                        alerts.append({
-                            'id': str(uuid.uuid4()),
-                            'type': 'sentiment_spike',
-                            'severity': 'low',  # Positive spikes are good
-                            'title': 'Positive Sentiment Surge Detected',
-                            'description': f'Positive sentiment increased by {change:.1f}% in the last 2 hours',
-                            'timestamp': datetime.utcnow(),
-                            'value': change,
-                            'threshold': self.alert_thresholds['sentiment_spike']['positive_threshold'],
-                            'source': 'All Sources',
-                            'metadata': {
-                                'current_positive_pct': current_pct,
-                                'baseline_positive_pct': baseline_pct,
-                                'sample_size': current_total
-                            }
-                        })
+                # Check for negative sentiment spike
+                if sentiment == 'negative' and change > NEGATIVE_SPIKE_THRESHOLD:
+                    alerts.append({
+                        'id': secrets.token_hex(16),
+                        'type': 'sentiment_spike',
+                        'severity': 'high' if change > 25 else 'medium',
+                        'title': 'Negative Sentiment Spike Detected',
+                        'description': f'Negative sentiment increased by {change:.1f}% in the last 2 hours',
+                        'timestamp': now,
+                        'value': change,
+                        'threshold': NEGATIVE_SPIKE_THRESHOLD,
+                        'source': 'All Sources',
+                        'metadata': {
+                            'current_negative_pct': current_pct,
+                            'baseline_negative_pct': baseline_pct,
+                            'sample_size': current_total
+                        }
+                    })
                 
+                # Check for positive sentiment spike (good news!)
+                elif sentiment == 'positive' and change > POSITIVE_SPIKE_THRESHOLD:
+                    alerts.append({
+                        'id': secrets.token_hex(16),
+                        'type': 'sentiment_spike',
+                        'severity': 'low',  # Positive spikes are good
+                        'title': 'Positive Sentiment Surge Detected',
+                        'description': f'Positive sentiment increased by {change:.1f}% in the last 2 hours',
+                        'timestamp': now,
+                        'value': change,
+                        'threshold': POSITIVE_SPIKE_THRESHOLD,
+                        'source': 'All Sources',
+                        'metadata': {
+                            'current_positive_pct': current_pct,
+                            'baseline_positive_pct': baseline_pct,
+                            'sample_size': current_total
+                        }
+                    })
+            
         except Exception as e:
             logger.error(f"Error detecting sentiment anomalies: {e}")
         
         return alerts
     
-    async def detect_volume_anomalies(self) -> List[Dict[str, Any]]:
+    async def detect_volume_anomalies(self, now: Optional[datetime] = None) -> List[Dict[str, Any]]:
         """Detect unusual spikes in mention volume."""
         alerts = []
+        now = now or datetime.utcnow()
         
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                # Get current hour volume
-                current_hour = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
-                cursor = await db.execute("""
-                    SELECT COUNT(*) FROM posts 
-                    WHERE timestamp >= ?
-                """, (current_hour,))
-                
-                current_volume = (await cursor.fetchone())[0]
-                
-                # Get average volume for same hour over past week
-                past_week_volumes = []
-                for i in range(1, 8):  # Last 7 days
-                    past_hour = current_hour - timedelta(days=i)
-                    cursor = await db.execute("""
-                        SELECT COUNT(*) FROM posts 
-                        WHERE timestamp BETWEEN ? AND ?
-                    """, (past_hour, past_hour + timedelta(hours=1)))
-                    
-                    volume = (await cursor.fetchone())[0]
-                    if volume > 0:
-                        past_week_volumes.append(volume)
-                
-                if len(past_week_volumes) < 3:  # Not enough historical data
-                    return alerts
-                
-                avg_volume = statistics.mean(past_week_volumes)
-                threshold = avg_volume * self.alert_thresholds['volume_surge']['threshold_multiplier']
-                
-                if current_volume > threshold and current_volume > 10:  # Minimum volume threshold
-                    multiplier = current_volume / avg_volume
-                    alerts.append({
-                        'id': str(uuid.uuid4()),
-                        'type': 'volume_surge',
-                        'severity': 'high' if multiplier > 5 else 'medium',
-                        'title': 'Mention Volume Surge Detected',
-                        'description': f'Brand mentions increased by {((multiplier - 1) * 100):.0f}% compared to average',
-                        'timestamp': datetime.utcnow(),
-                        'value': multiplier,
-                        'threshold': self.alert_thresholds['volume_surge']['threshold_multiplier'],
-                        'source': 'All Sources',
-                        'metadata': {
-                            'current_volume': current_volume,
-                            'average_volume': avg_volume,
-                            'historical_volumes': past_week_volumes
-                        }
-                    })
-                
+            # Current hour volume and the same hour of day over the past week
+            current_hour = now.replace(minute=0, second=0, microsecond=0)
+            current_volume, history = await self.run_db(self._fetch_hourly_volumes, current_hour)
+            
+            past_week_volumes = [volume for _, volume in history if volume > 0]
+            
+            if len(past_week_volumes) < 3:  # Not enough historical data
+                return alerts
+            
+            avg_volume = fmean(past_week_volumes)
+            threshold = avg_volume * VOLUME_SURGE_MULTIPLIER
+            
+            if current_volume > threshold and current_volume > 10:  # Minimum volume threshold
+                multiplier = current_volume / avg_volume
+                alerts.append({
+                    'id': secrets.token_hex(16),
+                    'type': 'volume_surge',
+                    'severity': 'high' if multiplier > 5 else 'medium',
+                    'title': 'Mention Volume Surge Detected',
+                    'description': f'Brand mentions increased by {((multiplier - 1) * 100):.0f}% compared to average',
+                    'timestamp': now,
+                    'value': multiplier,
+                    'threshold': VOLUME_SURGE_MULTIPLIER,
+                    'source': 'All Sources',
+                    'metadata': {
+                        'current_volume': current_volume,
+                        'average_volume': avg_volume,
+                        'historical_volumes': past_week_volumes
+                    }
+                })
+            
         except Exception as e:
             logger.error(f"Error detecting volume anomalies: {e}")
         
         return alerts
     
-    async def detect_engagement_anomalies(self) -> List[Dict[str, Any]]:
+    async def detect_engagement_anomalies(self, now: Optional[datetime] = None) -> List[Dict[str, Any]]:
         """Detect unusual engagement patterns (placeholder for future implementation)."""
         # This would analyze engagement metrics like comments, shares, likes
         # For now, return empty list as we don't have engagement data
@@ -265,12 +319,15 @@ class CrisisDetectionService:
     
     async def store_alert(self, alert: Dict[str, Any]):
         """Store alert in database."""
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute("""
-                INSERT INTO alerts 
-                (id, type, severity, title, description, timestamp, value, threshold, source, metadata)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
+        await self.store_alerts([alert])
+    
+    async def store_alerts(self, alerts: List[Dict[str, Any]]):
+        """Store several alerts with one executemany and one commit."""
+        if not alerts:
+            return
+        
+        await self.run_db(self._insert_alerts, [
+            (
                 alert['id'],
                 alert['type'],
                 alert['severity'],
@@ -280,49 +337,69 @@ class CrisisDetectionService:
                 alert.get('value'),
                 alert.get('threshold'),
                 alert.get('source'),
-                str(alert.get('metadata', {}))
-            ))
-            await db.commit()
+                json.dumps(alert.get('metadata') or {})
+            )
+            for alert in alerts
+        ])
     
     async def get_active_alerts(self, limit: int = 10) -> List[Dict[str, Any]]:
         """Get active (unacknowledged) alerts."""
-        async with aiosqlite.connect(self.db_path) as db:
-            cursor = await db.execute("""
-                SELECT id, type, severity, title, description, timestamp, value, threshold, source
-                FROM alerts 
-                WHERE acknowledged = FALSE
-                ORDER BY timestamp DESC 
-                LIMIT ?
-            """, (limit,))
-            
-            rows = await cursor.fetchall()
-            
-            alerts = []
-            for row in rows:
-                alerts.append({
-                    'id': row[0],
-                    'type': row[1],
-                    'severity': row[2],
-                    'title': row[3],
-                    'description': row[4],
-                    'timestamp': datetime.fromisoformat(row[5]) if isinstance(row[5], str) else row[5],
-                    'value': row[6],
-                    'threshold': row[7],
-                    'source': row[8]
-                })
-            
-            return alerts
+        rows = await self.run_db(self._fetch_active_alerts, limit)
+        
+        # Column names match the alert keys; timestamps stay ISO strings for AlertData to parse
+        return [dict(row) for row in rows]
     
     async def acknowledge_alert(self, alert_id: str) -> bool:
         """Mark an alert as acknowledged."""
-        async with aiosqlite.connect(self.db_path) as db:
-            cursor = await db.execute("""
-                UPDATE alerts SET acknowledged = TRUE 
-                WHERE id = ?
-            """, (alert_id,))
-            await db.commit()
-            return cursor.rowcount > 0
+        return await self.run_db(self._acknowledge_alert, alert_id)
+    
+    # Synchronous query bodies, executed on the database thread via run_db
+    
+    def _fetch_latest_post_timestamp(self) -> Optional[int]:
+        """Timestamp of the newest post, or None when there are no posts."""
+        return self.get_db().execute(_SQL_LATEST_POST).fetchone()[0]
+    
+    def _fetch_sentiment_windows(self, params: Dict[str, int]) -> List[sqlite3.Row]:
+        """Current and baseline counts per sentiment."""
+        return self.get_db().execute(_SQL_SENTIMENT_WINDOWS, params).fetchall()
+    
+    def _fetch_hourly_volumes(self, current_hour: datetime) -> Tuple[int, List[sqlite3.Row]]:
+        """Current hour volume plus per-day volumes for the same hour over the past week."""
+        db = self.get_db()
+        current_start = epoch_seconds(current_hour)
+        current_volume = db.execute(_SQL_CURRENT_VOLUME, (current_start,)).fetchone()[0]
+        history = db.execute(_SQL_HOURLY_VOLUME_HISTORY, (
+            current_start - 7 * 86400,
+            current_start - 86400 + 3600,
+            current_hour.hour
+        )).fetchall()
+        return current_volume, history
+    
+    def _insert_alerts(self, rows: List[Tuple]):
+        """Insert alert rows in a single transaction."""
+        db = self.get_db()
+        db.executemany(_SQL_INSERT_ALERT, rows)
+        db.commit()
+    
+    def _fetch_active_alerts(self, limit: int) -> List[sqlite3.Row]:
+        """Newest unacknowledged alerts."""
+        return self.get_db().execute(_SQL_ACTIVE_ALERTS, (limit,)).fetchall()
+    
+    def _acknowledge_alert(self, alert_id: str) -> bool:
+        """Flag one alert as acknowledged; False when the id is unknown."""
+        db = self.get_db()
+        cursor = db.execute(_SQL_ACKNOWLEDGE_ALERT, (alert_id,))
+        db.commit()
+        return cursor.rowcount > 0
+    
+    def _close_db(self):
+        """Close the connection on the thread that owns it."""
+        if self.db:
+            self.db.close()
+            self.db = None
     
     async def cleanup(self):
         """Cleanup resources."""
+        await self.run_db(self._close_db)
+        self.db_executor.shutdown(wait=True)
         logger.info("Crisis Detection Service cleaned up")
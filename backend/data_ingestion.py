@@ -5,40 +5,233 @@ Handles data collection from Reddit, YouTube, and News APIs with concurrent proc
 
 import asyncio
 import logging
+import re
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
-import hashlib
+from typing import Awaitable, Callable, Dict, List, Optional, Any, Sequence, Tuple
 import json
 
 import aiohttp
 import asyncpraw
-from googleapiclient.discovery import build
 from newsapi import NewsApiClient
 import sqlite3
 import aiosqlite
 
+from .caching import BloomFilter, TTLCache, text_key
 from .config import settings
+from .database import epoch_seconds, open_connection
 
 logger = logging.getLogger(__name__)
 
+YOUTUBE_SEARCH_URL = "https://www.googleapis.com/youtube/v3/search"
+
+# Hashes per IN (...) lookup, below SQLite's bound-parameter limit
+HASH_LOOKUP_CHUNK = 500
+
+# Hot-path SQL kept as module constants so every call reuses the same
+# statement text and hits the connection's prepared-statement cache
+# A post seen again keeps its row and indexes; only the analysis columns are
+# refreshed in place (no delete + reinsert)
+_SQL_INSERT_POST = """
+    INSERT INTO posts 
+    (id, source, content, url, timestamp, sentiment, confidence, ts_epoch, sentiment_score)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(id) DO UPDATE SET
+        sentiment = excluded.sentiment,
+        confidence = excluded.confidence,
+        sentiment_score = excluded.sentiment_score
+"""
+
+# Mentions in the last 24 hours per sentiment (NULL = not yet analyzed) in one scan;
+# "+sentiment" keeps the planner on the covering idx_posts_epoch_sent range
+_SQL_CURRENT_STATS = """
+    SELECT sentiment, COUNT(*) FROM posts 
+    WHERE ts_epoch > strftime('%s', 'now') - 86400
+    GROUP BY +sentiment
+"""
+
+# Content is cut to 200 characters in SQL so only the feed preview leaves SQLite
+_SQL_RECENT_FEED = """
+    SELECT id, source,
+        CASE WHEN length(content) > 200 THEN substr(content, 1, 200) || '...' ELSE content END AS text,
+        url, timestamp, sentiment, COALESCE(confidence, 0.0) AS confidence
+    FROM posts
+    WHERE sentiment IS NOT NULL
+    ORDER BY ts_epoch DESC
+    LIMIT ?
+"""
+
+# Hourly positive/negative counts for the 7 most recent hours with data;
+# buckets are epoch hours, so grouping is an integer divide per row
+_SQL_HOURLY_TREND = """
+    SELECT
+        ts_epoch / 3600 as hour,
+        SUM(sentiment = 'positive') as positive,
+        SUM(sentiment = 'negative') as negative
+    FROM posts
+    WHERE ts_epoch > strftime('%s', 'now') - ?
+    AND sentiment IS NOT NULL
+    GROUP BY hour
+    ORDER BY hour DESC
+    LIMIT 7
+"""
+
+_SQL_NEGATIVE_POSTS = """
+    SELECT id, source, content, url, timestamp, COALESCE(confidence, 0.0) AS confidence
+    FROM posts
+    WHERE sentiment = 'negative'
+    AND ts_epoch > strftime('%s', 'now') - 86400
+    ORDER BY confidence DESC, ts_epoch DESC
+    LIMIT ?
+"""
+
+
+_POSTS_COLUMNS = """
+    id TEXT PRIMARY KEY,
+    source TEXT NOT NULL,
+    content TEXT NOT NULL,
+    url TEXT,
+    timestamp DATETIME NOT NULL,
+    sentiment TEXT,
+    confidence REAL,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    ts_epoch INTEGER NOT NULL,
+    sentiment_score INTEGER
+"""
+
+# Numeric form of posts.sentiment stored alongside it, so aggregates are a
+# plain SUM/AVG instead of a string CASE per row
+SENTIMENT_SCORES = {'positive': 1, 'negative': -1}
+
+
+# Hourly sentiment rollup (hour = ts_epoch / 3600) kept current by triggers on posts,
+# so forecasting reads at most a few hundred pre-aggregated rows instead of scanning posts.
+# Scores come from posts.sentiment_score.
+_SQL_CREATE_HOURLY_SENTIMENT = """
+    CREATE TABLE IF NOT EXISTS hourly_sentiment (
+        hour INTEGER PRIMARY KEY,
+        sum_score REAL NOT NULL,
+        count INTEGER NOT NULL
+    )
+"""
+
+_SQL_HOURLY_SENTIMENT_TRIGGERS = (
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_posts_hourly_insert
+    AFTER INSERT ON posts WHEN NEW.sentiment IS NOT NULL
+    BEGIN
+        INSERT INTO hourly_sentiment (hour, sum_score, count)
+        VALUES (NEW.ts_epoch / 3600, NEW.sentiment_score, 1)
+        ON CONFLICT(hour) DO UPDATE SET
+            sum_score = sum_score + excluded.sum_score,
+            count = count + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_posts_hourly_unscore
+    AFTER UPDATE OF sentiment ON posts WHEN OLD.sentiment IS NOT NULL
+    BEGIN
+        UPDATE hourly_sentiment SET
+            sum_score = sum_score - OLD.sentiment_score,
+            count = count - 1
+        WHERE hour = OLD.ts_epoch / 3600;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_posts_hourly_rescore
+    AFTER UPDATE OF sentiment ON posts WHEN NEW.sentiment IS NOT NULL
+    BEGIN
+        INSERT INTO hourly_sentiment (hour, sum_score, count)
+        VALUES (NEW.ts_epoch / 3600, NEW.sentiment_score, 1)
+        ON CONFLICT(hour) DO UPDATE SET
+            sum_score = sum_score + excluded.sum_score,
+            count = count + 1;
+    END
+    """,
+)
+
+_SQL_BACKFILL_HOURLY_SENTIMENT = """
+    INSERT INTO hourly_sentiment (hour, sum_score, count)
+    SELECT ts_epoch / 3600,
+        SUM(sentiment_score),
+        COUNT(*)
+    FROM posts
+    WHERE sentiment IS NOT NULL
+    GROUP BY ts_epoch / 3600
+    ON CONFLICT(hour) DO NOTHING
+"""
+
+
+def sentiment_score(sentiment: Optional[str]) -> Optional[int]:
+    """posts.sentiment_score for a sentiment label: +1 positive, -1 negative, 0 otherwise."""
+    if sentiment is None:
+        return None
+    return SENTIMENT_SCORES.get(sentiment, 0)
+
+
+def content_id(content: str) -> str:
+    """Post id derived from the content, so the primary key doubles as the dedup key."""
+    return text_key(content).hex()
+
+
+@dataclass(slots=True)
+class Post:
+    """A collected mention, with fields in posts-table column order."""
+    id: str
+    source: str
+    content: str
+    url: Optional[str]
+    timestamp: datetime
+    sentiment: Optional[str] = None
+    confidence: Optional[float] = None
+    raw_data: Dict[str, Any] = field(default_factory=dict)
+    
+    def as_row(self) -> Tuple:
+        """Values for the posts INSERT, in column order."""
+        return (
+            self.id, self.source, self.content, self.url,
+            self.timestamp, self.sentiment, self.confidence,
+            epoch_seconds(self.timestamp), sentiment_score(self.sentiment)
+        )
+
 
 class DataIngestionService:
     """Service for collecting and managing data from multiple sources."""
     
     def __init__(self):
         self.reddit_client: Optional[asyncpraw.Reddit] = None
-        self.youtube_client = None
         self.news_client: Optional[NewsApiClient] = None
         self.db_path = "echosense.db"
+        self.db: Optional[aiosqlite.Connection] = None
+        self.db_lock = asyncio.Lock()
         self.session: Optional[aiohttp.ClientSession] = None
+        self.seen_hashes = BloomFilter(settings.dedup_filter_capacity)
+        self.collection_semaphore = asyncio.Semaphore(max(1, settings.collection_concurrency))
+        self.brand_pattern = self._build_brand_pattern()
+        # Dashboard reads change at ingestion cadence; repeated polls within the TTL skip SQLite.
+        # Writes clear only this process's cache, so with WORKERS > 1 reads served by workers
+        # other than the monitoring one can lag stored posts by up to read_cache_ttl.
+        self.read_cache = TTLCache(ttl=settings.read_cache_ttl)
+        # Pending post writes, coalesced by one writer task into a transaction per drain
+        self.write_queue: Optional[asyncio.Queue] = None
+        self.writer_task: Optional[asyncio.Task] = None
         
     async def initialize(self):
         """Initialize all data source clients and database."""
         logger.info("Initializing Data Ingestion Service...")
         
         try:
-            # Initialize HTTP session
-            self.session = aiohttp.ClientSession()
+            # Initialize HTTP session with an explicit keep-alive pool and DNS cache
+            connector = aiohttp.TCPConnector(
+                limit=64,
+                limit_per_host=32,
+                ttl_dns_cache=300,
+                keepalive_timeout=60
+            )
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=30)
+            )
             
             # Initialize Reddit client
             self.reddit_client = asyncpraw.Reddit(
@@ -48,17 +241,13 @@ class DataIngestionService:
                 requestor_kwargs={"session": self.session}
             )
             
-            # Initialize YouTube client (synchronous)
-            self.youtube_client = build(
-                'youtube', 'v3',
-                developerKey=settings.youtube_api_key
-            )
-            
             # Initialize News API client
             self.news_client = NewsApiClient(api_key=settings.news_api_key)
             
             # Initialize database
             await self.init_database()
+            await self.load_seen_hashes()
+            self.start_writer()
             
             logger.info("Data Ingestion Service initialized successfully")
             
@@ -66,131 +255,209 @@ class DataIngestionService:
             logger.error(f"Failed to initialize Data Ingestion Service: {e}")
             raise
     
+    async def get_db(self) -> aiosqlite.Connection:
+        """Return the shared database connection, opening it on first use."""
+        async with self.db_lock:
+            if self.db is None:
+                self.db = await open_connection(self.db_path)
+                self.db.row_factory = aiosqlite.Row
+        return self.db
+    
     async def init_database(self):
         """Initialize SQLite database with required tables."""
-        async with aiosqlite.connect(self.db_path) as db:
-            # Create posts table
+        db = await self.get_db()
+        # Create posts table
+        await db.execute(f"CREATE TABLE IF NOT EXISTS posts ({_POSTS_COLUMNS})")
+        
+        # Create AI responses table
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS ai_responses (
+                id TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                target_post_id TEXT,
+                quality_score REAL,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (target_post_id) REFERENCES posts (id)
+            )
+        """)
+        await self.migrate_posts_table(db)
+        await self.init_hourly_sentiment(db)
+        
+        # Create indexes for better performance
+        await db.execute("CREATE INDEX IF NOT EXISTS idx_posts_timestamp ON posts(timestamp)")
+        # (sentiment, ts_epoch) serves get_negative_posts' equality + range and supersedes
+        # the old single-column sentiment index
+        await db.execute("CREATE INDEX IF NOT EXISTS idx_posts_sent_epoch ON posts(sentiment, ts_epoch)")
+        # Covering index for the time-window stats, trend and crisis detector scans
+        await db.execute("CREATE INDEX IF NOT EXISTS idx_posts_epoch_sent ON posts(ts_epoch, sentiment)")
+        # Superseded by the integer-keyed indexes above
+        for old_index in ('idx_posts_sentiment', 'idx_posts_sent_ts', 'idx_posts_ts_sent'):
+            await db.execute(f"DROP INDEX IF EXISTS {old_index}")
+        await db.execute("CREATE INDEX IF NOT EXISTS idx_posts_source ON posts(source)")
+        await db.execute("CREATE INDEX IF NOT EXISTS idx_ai_responses_timestamp ON ai_responses(timestamp DESC)")
+
+        await db.commit()
+
+        # Insert demo data if the table is empty
+        cursor = await db.execute("SELECT COUNT(*) FROM posts")
+        count = (await cursor.fetchone())[0]
+
+        if count == 0:
+            await self.insert_demo_data(db)
+
+    async def init_hourly_sentiment(self, db):
+        """Create the hourly sentiment rollup and its triggers, seeding it from existing posts."""
+        await db.execute(_SQL_CREATE_HOURLY_SENTIMENT)
+        for trigger in _SQL_HOURLY_SENTIMENT_TRIGGERS:
+            await db.execute(trigger)
+        
+        cursor = await db.execute("SELECT EXISTS (SELECT 1 FROM hourly_sentiment)")
+        if not (await cursor.fetchone())[0]:
+            await db.execute(_SQL_BACKFILL_HOURLY_SENTIMENT)
+        await db.commit()
+    
+    async def migrate_posts_table(self, db):
+        """Bring a posts table created by an older version up to the current schema."""
+        cursor = await db.execute("PRAGMA table_info(posts)")
+        columns = {column[1] for column in await cursor.fetchall()}
+        
+        if 'ts_epoch' not in columns:
+            await db.execute("ALTER TABLE posts ADD COLUMN ts_epoch INTEGER NOT NULL DEFAULT 0")
+            await db.execute("UPDATE posts SET ts_epoch = CAST(strftime('%s', timestamp) AS INTEGER)")
+            await db.commit()
+            logger.info("Backfilled posts.ts_epoch from posts.timestamp")
+        
+        if 'sentiment_score' not in columns:
+            await db.execute("ALTER TABLE posts ADD COLUMN sentiment_score INTEGER")
             await db.execute("""
-                CREATE TABLE IF NOT EXISTS posts (
-                    id TEXT PRIMARY KEY,
-                    source TEXT NOT NULL,
-                    content TEXT NOT NULL,
-                    url TEXT,
-                    timestamp DATETIME NOT NULL,
-                    sentiment TEXT,
-                    confidence REAL,
-                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    hash TEXT UNIQUE
-                )
+                UPDATE posts SET sentiment_score = CASE sentiment WHEN 'positive' THEN 1 WHEN 'negative' THEN -1 ELSE 0 END
+                WHERE sentiment IS NOT NULL
             """)
+            await db.commit()
+            logger.info("Backfilled posts.sentiment_score from posts.sentiment")
+        
+        if 'hash' in columns:
+            # Rows are re-keyed by content_id() so they match the ids new collections
+            # compute (the old MD5 hashes never would), AI responses are repointed at
+            # the new ids, and the table is rebuilt without the column: SQLite cannot
+            # drop a UNIQUE column
+            await db.execute("CREATE TEMP TABLE post_id_map (old_id TEXT PRIMARY KEY, new_id TEXT NOT NULL)")
+            cursor = await db.execute("SELECT id, content FROM posts")
+            while True:
+                rows = await cursor.fetchmany(10_000)
+                if not rows:
+                    break
+                await db.executemany(
+                    "INSERT INTO post_id_map VALUES (?, ?)",
+                    [(post_id, content_id(content)) for post_id, content in rows]
+                )
             
-            # Create AI responses table
             await db.execute("""
-                CREATE TABLE IF NOT EXISTS ai_responses (
-                    id TEXT PRIMARY KEY,
-                    response TEXT NOT NULL,
-                    target_post_id TEXT,
-                    quality_score REAL,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (target_post_id) REFERENCES posts (id)
+                UPDATE ai_responses SET target_post_id = (
+                    SELECT new_id FROM post_id_map WHERE old_id = ai_responses.target_post_id
                 )
+                WHERE target_post_id IN (SELECT old_id FROM post_id_map)
             """)
-            
-            # Create indexes for better performance
-            await db.execute("CREATE INDEX IF NOT EXISTS idx_posts_timestamp ON posts(timestamp)")
-            await db.execute("CREATE INDEX IF NOT EXISTS idx_posts_sentiment ON posts(sentiment)")
-            await db.execute("CREATE INDEX IF NOT EXISTS idx_posts_source ON posts(source)")
-
+            await db.execute(f"CREATE TABLE posts_migrated ({_POSTS_COLUMNS})")
+            # Rows with identical content collapse into one post under the shared id
+            await db.execute("""
+                INSERT OR IGNORE INTO posts_migrated
+                    (id, source, content, url, timestamp, sentiment, confidence, created_at, ts_epoch, sentiment_score)
+                SELECT post_id_map.new_id, source, content, url, timestamp, sentiment, confidence,
+                    created_at, ts_epoch, sentiment_score
+                FROM posts JOIN post_id_map ON post_id_map.old_id = posts.id
+            """)
+            await db.execute("DROP TABLE post_id_map")
+            await db.execute("DROP TABLE posts")
+            await db.execute("ALTER TABLE posts_migrated RENAME TO posts")
             await db.commit()
-
-            # Insert demo data if the table is empty
-            cursor = await db.execute("SELECT COUNT(*) FROM posts")
-            count = (await cursor.fetchone())[0]
-
-            if count == 0:
-                await self.insert_demo_data(db)
-
+            logger.info("Rebuilt posts table keyed by content hash")
+    
+    async def load_seen_hashes(self):
+        """Fill the Bloom filter with the content hashes already stored."""
+        db = await self.get_db()
+        cursor = await db.execute("SELECT id FROM posts")
+        
+        while True:
+            rows = await cursor.fetchmany(10_000)
+            if not rows:
+                break
+            for (post_id,) in rows:
+                try:
+                    self.seen_hashes.add(bytes.fromhex(post_id))
+                except ValueError:
+                    continue  # ids from before content-derived keys
+        
+        logger.info(f"Loaded {self.seen_hashes.count} stored content hashes for deduplication")
+    
     async def insert_demo_data(self, db):
         """Insert demo data for testing purposes."""
         from datetime import datetime, timedelta
-        import uuid
 
         demo_posts = [
             {
-                'id': str(uuid.uuid4()),
                 'source': 'Reddit',
                 'content': 'The new Tesla Model 3 is absolutely fantastic! The build quality has improved significantly.',
                 'url': 'https://reddit.com/r/tesla/post1',
                 'timestamp': datetime.utcnow() - timedelta(hours=1),
                 'sentiment': 'positive',
-                'confidence': 0.89,
-                'hash': 'demo_hash_1'
+                'confidence': 0.89
             },
             {
-                'id': str(uuid.uuid4()),
                 'source': 'Twitter',
                 'content': 'Tesla customer service was incredibly helpful today. Impressed with their response time!',
                 'url': 'https://twitter.com/user/status1',
                 'timestamp': datetime.utcnow() - timedelta(hours=2),
                 'sentiment': 'positive',
-                'confidence': 0.92,
-                'hash': 'demo_hash_2'
+                'confidence': 0.92
             },
             {
-                'id': str(uuid.uuid4()),
                 'source': 'News',
                 'content': 'Tesla reports mixed quarterly results as analysts watch the company closely.',
                 'url': 'https://news.com/tesla-quarterly',
                 'timestamp': datetime.utcnow() - timedelta(hours=3),
                 'sentiment': 'neutral',
-                'confidence': 0.75,
-                'hash': 'demo_hash_3'
+                'confidence': 0.75
             },
             {
-                'id': str(uuid.uuid4()),
                 'source': 'Reddit',
                 'content': 'I\'m disappointed with the latest Tesla update. Too many bugs and issues.',
                 'url': 'https://reddit.com/r/tesla/post2',
                 'timestamp': datetime.utcnow() - timedelta(hours=4),
                 'sentiment': 'negative',
-                'confidence': 0.84,
-                'hash': 'demo_hash_4'
+                'confidence': 0.84
             },
             {
-                'id': str(uuid.uuid4()),
                 'source': 'YouTube',
                 'content': 'Tesla Model Y review: Great performance but expensive for what you get.',
                 'url': 'https://youtube.com/watch?v=demo',
                 'timestamp': datetime.utcnow() - timedelta(hours=5),
                 'sentiment': 'neutral',
-                'confidence': 0.68,
-                'hash': 'demo_hash_5'
+                'confidence': 0.68
             },
             {
-                'id': str(uuid.uuid4()),
                 'source': 'Twitter',
                 'content': 'El nuevo Tesla es increíble, me encanta la tecnología!',
                 'url': 'https://twitter.com/user/status2',
                 'timestamp': datetime.utcnow() - timedelta(hours=6),
                 'sentiment': 'positive',
-                'confidence': 0.91,
-                'hash': 'demo_hash_6'
+                'confidence': 0.91
             }
         ]
 
-        for post in demo_posts:
-            await db.execute("""
-                INSERT INTO posts (id, source, content, url, timestamp, sentiment, confidence, hash)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                post['id'], post['source'], post['content'], post['url'],
-                post['timestamp'], post['sentiment'], post['confidence'], post['hash']
-            ))
+        await db.executemany(_SQL_INSERT_POST, [
+            (
+                content_id(post['content']), post['source'], post['content'], post['url'],
+                post['timestamp'], post['sentiment'], post['confidence'],
+                epoch_seconds(post['timestamp']), sentiment_score(post['sentiment'])
+            )
+            for post in demo_posts
+        ])
 
         await db.commit()
         logger.info(f"Inserted {len(demo_posts)} demo posts")
 
-    async def collect_all_sources(self) -> List[Dict[str, Any]]:
+    async def collect_all_sources(self) -> List[Post]:
         """Collect data from all sources concurrently."""
         logger.info("Starting data collection from all sources...")
         
@@ -217,308 +484,339 @@ class DataIngestionService:
         
         return unique_data
     
-    async def collect_reddit_data(self) -> List[Dict[str, Any]]:
+    def _build_brand_pattern(self) -> Optional[re.Pattern]:
+        """Compile one case-insensitive, word-bounded alternation of all target brands."""
+        # Longest first so multi-word brands win over their prefixes
+        brands = sorted((brand for brand in settings.target_brands_list if brand), key=len, reverse=True)
+        if not brands:
+            return None
+        
+        return re.compile(r"\b(" + "|".join(map(re.escape, brands)) + r")\b", re.IGNORECASE)
+    
+    async def gather_collected(self, source: str, keys: Sequence[str],
+                               collect_one: Callable[[str], Awaitable[List[Post]]]) -> List[Post]:
+        """Run one collector per subreddit/brand/keyword concurrently and merge the results."""
+        async def limited(key: str) -> List[Post]:
+            async with self.collection_semaphore:
+                return await collect_one(key)
+        
+        results = await asyncio.gather(*(limited(key) for key in keys), return_exceptions=True)
+        
+        posts = []
+        for key, result in zip(keys, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error collecting {source} data for {key}: {result}")
+            else:
+                posts.extend(result)
+        
+        return posts
+    
+    async def collect_reddit_data(self) -> List[Post]:
         """Collect data from Reddit."""
         if not self.reddit_client:
             return []
         
+        return await self.gather_collected('Reddit', settings.subreddits_list, self.collect_subreddit)
+    
+    async def collect_subreddit(self, subreddit_name: str) -> List[Post]:
+        """Collect brand-mentioning hot posts from one subreddit."""
         posts = []
-        try:
-            for subreddit_name in settings.subreddits_list:
-                subreddit = await self.reddit_client.subreddit(subreddit_name)
-                
-                # Get hot posts
-                async for submission in subreddit.hot(limit=settings.max_posts_per_source // len(settings.subreddits_list)):
-                    # Check if post mentions target brands
-                    if any(brand.lower() in submission.title.lower() or 
-                          brand.lower() in submission.selftext.lower() 
-                          for brand in settings.target_brands_list):
-                        
-                        posts.append({
-                            'id': f"reddit_{submission.id}",
-                            'source': 'Reddit',
-                            'content': f"{submission.title}\n{submission.selftext}",
-                            'url': f"https://reddit.com{submission.permalink}",
-                            'timestamp': datetime.fromtimestamp(submission.created_utc),
-                            'raw_data': {
-                                'subreddit': subreddit_name,
-                                'score': submission.score,
-                                'num_comments': submission.num_comments
-                            }
-                        })
+        if not self.brand_pattern:
+            return posts
+        
+        subreddit = await self.reddit_client.subreddit(subreddit_name)
+        
+        # Get hot posts
+        async for submission in subreddit.hot(limit=settings.max_posts_per_source // len(settings.subreddits_list)):
+            # Check if post mentions target brands
+            if self.brand_pattern.search(submission.title) or self.brand_pattern.search(submission.selftext):
+                content = f"{submission.title}\n{submission.selftext}"[:settings.max_content_chars]
                 
-        except Exception as e:
-            logger.error(f"Error collecting Reddit data: {e}")
+                posts.append(Post(
+                    id=content_id(content),
+                    source='Reddit',
+                    content=content,
+                    url=f"https://reddit.com{submission.permalink}",
+                    timestamp=datetime.utcfromtimestamp(submission.created_utc),
+                    raw_data={
+                        'subreddit': subreddit_name,
+                        'score': submission.score,
+                        'num_comments': submission.num_comments
+                    }
+                ))
         
         return posts
     
-    async def collect_youtube_data(self) -> List[Dict[str, Any]]:
+    async def collect_youtube_data(self) -> List[Post]:
         """Collect data from YouTube."""
-        if not self.youtube_client:
+        if not self.session or not settings.youtube_api_key:
             return []
         
+        # Search for videos related to target brands
+        return await self.gather_collected('YouTube', settings.target_brands_list, self.collect_youtube_brand)
+    
+    async def collect_youtube_brand(self, brand: str) -> List[Post]:
+        """Collect recent videos matching one brand."""
         posts = []
-        try:
-            # Search for videos related to target brands
-            for brand in settings.target_brands_list:
-                search_response = self.youtube_client.search().list(
-                    q=brand,
-                    part='id,snippet',
-                    maxResults=settings.max_posts_per_source // len(settings.target_brands_list),
-                    order='relevance',
-                    publishedAfter=(datetime.utcnow() - timedelta(days=7)).isoformat() + 'Z'
-                ).execute()
+        # YouTube Data API v3 search.list, called directly on the shared session
+        params = {
+            'q': brand,
+            'part': 'id,snippet',
+            'maxResults': settings.max_posts_per_source // len(settings.target_brands_list),
+            'order': 'relevance',
+            'publishedAfter': (datetime.utcnow() - timedelta(days=7)).isoformat() + 'Z',
+            'key': settings.youtube_api_key
+        }
+        async with self.session.get(YOUTUBE_SEARCH_URL, params=params) as response:
+            response.raise_for_status()
+            search_response = await response.json()
+        
+        for item in search_response.get('items', []):
+            if item['id']['kind'] == 'youtube#video':
+                video_id = item['id']['videoId']
+                snippet = item['snippet']
+                content = f"{snippet['title']}\n{snippet['description']}"[:settings.max_content_chars]
                 
-                for item in search_response.get('items', []):
-                    if item['id']['kind'] == 'youtube#video':
-                        video_id = item['id']['videoId']
-                        snippet = item['snippet']
-                        
-                        posts.append({
-                            'id': f"youtube_{video_id}",
-                            'source': 'YouTube',
-                            'content': f"{snippet['title']}\n{snippet['description']}",
-                            'url': f"https://www.youtube.com/watch?v={video_id}",
-                            'timestamp': datetime.fromisoformat(snippet['publishedAt'].replace('Z', '+00:00')),
-                            'raw_data': {
-                                'channel': snippet['channelTitle'],
-                                'channel_id': snippet['channelId']
-                            }
-                        })
-                        
-        except Exception as e:
-            logger.error(f"Error collecting YouTube data: {e}")
+                posts.append(Post(
+                    id=content_id(content),
+                    source='YouTube',
+                    content=content,
+                    url=f"https://www.youtube.com/watch?v={video_id}",
+                    timestamp=datetime.fromisoformat(snippet['publishedAt'].replace('Z', '+00:00')),
+                    raw_data={
+                        'channel': snippet['channelTitle'],
+                        'channel_id': snippet['channelId']
+                    }
+                ))
         
         return posts
     
-    async def collect_news_data(self) -> List[Dict[str, Any]]:
+    async def collect_news_data(self) -> List[Post]:
         """Collect data from News API."""
         if not self.news_client:
             return []
         
+        # Search for news articles
+        return await self.gather_collected('News', settings.news_keywords_list, self.collect_news_keyword)
+    
+    async def collect_news_keyword(self, keyword: str) -> List[Post]:
+        """Collect recent articles matching one keyword."""
         posts = []
-        try:
-            # Search for news articles
-            for keyword in settings.news_keywords_list:
-                articles = self.news_client.get_everything(
-                    q=keyword,
-                    language='en',
-                    sort_by='publishedAt',
-                    page_size=settings.max_posts_per_source // len(settings.news_keywords_list),
-                    from_param=(datetime.utcnow() - timedelta(days=7)).isoformat()
-                )
-                
-                for article in articles.get('articles', []):
-                    if article['title'] and article['description']:
-                        posts.append({
-                            'id': f"news_{hashlib.md5(article['url'].encode()).hexdigest()[:12]}",
-                            'source': 'News',
-                            'content': f"{article['title']}\n{article['description']}",
-                            'url': article['url'],
-                            'timestamp': datetime.fromisoformat(article['publishedAt'].replace('Z', '+00:00')),
-                            'raw_data': {
-                                'source_name': article['source']['name'],
-                                'author': article['author']
-                            }
-                        })
-                        
-        except Exception as e:
-            logger.error(f"Error collecting News data: {e}")
+        # newsapi-python uses blocking requests; keep it off the event loop
+        articles = await asyncio.to_thread(
+            self.news_client.get_everything,
+            q=keyword,
+            language='en',
+            sort_by='publishedAt',
+            page_size=settings.max_posts_per_source // len(settings.news_keywords_list),
+            from_param=(datetime.utcnow() - timedelta(days=7)).isoformat()
+        )
+        
+        for article in articles.get('articles', []):
+            if article['title'] and article['description']:
+                content = f"{article['title']}\n{article['description']}"[:settings.max_content_chars]
+                posts.append(Post(
+                    id=content_id(content),
+                    source='News',
+                    content=content,
+                    url=article['url'],
+                    timestamp=datetime.fromisoformat(article['publishedAt'].replace('Z', '+00:00')),
+                    raw_data={
+                        'source_name': article['source']['name'],
+                        'author': article['author']
+                    }
+                ))
         
         return posts
     
-    async def deduplicate_data(self, data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Remove duplicate posts based on content hash."""
-        seen_hashes = set()
-        unique_data = []
-        
-        for item in data:
-            # Create hash of content
-            content_hash = hashlib.md5(item['content'].encode()).hexdigest()
-            item['hash'] = content_hash
+    async def deduplicate_data(self, data: List[Post]) -> List[Post]:
+        """Remove duplicate posts based on content hash.
+        
+        Post ids are content digests (see ``content_id``). Within a batch a
+        dict keyed by digest keeps the first copy. Across batches the Bloom
+        filter clears unseen content without touching SQLite, and only
+        "possibly seen" ids are checked against the posts primary key.
+        """
+        unique_data: Dict[bytes, Post] = {}
+        
+        for post in data:
+            # Raw 16-byte digests keep the keys small; the stored id is hex
+            content_hash = bytes.fromhex(post.id)
             
-            if content_hash not in seen_hashes:
-                seen_hashes.add(content_hash)
-                unique_data.append(item)
+            if content_hash not in unique_data:
+                unique_data[content_hash] = post
         
-        return unique_data
+        maybe_seen = [key.hex() for key in unique_data if key in self.seen_hashes]
+        if maybe_seen:
+            db = await self.get_db()
+            for start in range(0, len(maybe_seen), HASH_LOOKUP_CHUNK):
+                chunk = maybe_seen[start:start + HASH_LOOKUP_CHUNK]
+                cursor = await db.execute(
+                    f"SELECT id FROM posts WHERE id IN ({','.join('?' * len(chunk))})", chunk
+                )
+                for (post_id,) in await cursor.fetchall():
+                    unique_data.pop(bytes.fromhex(post_id), None)
+        
+        for key in unique_data:
+            self.seen_hashes.add(key)
+        
+        return list(unique_data.values())
     
-    async def store_analyzed_data(self, analyzed_data: List[Dict[str, Any]]):
-        """Store analyzed data in the database."""
-        async with aiosqlite.connect(self.db_path) as db:
-            for item in analyzed_data:
-                try:
-                    await db.execute("""
-                        INSERT OR REPLACE INTO posts 
-                        (id, source, content, url, timestamp, sentiment, confidence, hash)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        item['id'],
-                        item['source'],
-                        item['content'],
-                        item.get('url'),
-                        item['timestamp'],
-                        item.get('sentiment'),
-                        item.get('confidence'),
-                        item.get('hash')
-                    ))
-                except Exception as e:
-                    logger.error(f"Error storing item {item['id']}: {e}")
+    def start_writer(self):
+        """Start the background task that drains queued post writes."""
+        if self.writer_task is None or self.writer_task.done():
+            self.write_queue = asyncio.Queue()
+            self.writer_task = asyncio.create_task(self.drain_writes())
+    
+    async def store_analyzed_data(self, analyzed_data: List[Post]):
+        """Store analyzed data in the database.
+        
+        Rows are queued for the writer task, which commits every batch waiting
+        at the time in one transaction; this returns once that commit is done.
+        """
+        if not analyzed_data:
+            return
+        
+        self.start_writer()
+        done = asyncio.get_running_loop().create_future()
+        await self.write_queue.put(([post.as_row() for post in analyzed_data], done))
+        await done
+    
+    async def drain_writes(self):
+        """Writer loop: take everything queued and store it with one commit."""
+        while True:
+            batch = [await self.write_queue.get()]
+            while not self.write_queue.empty():
+                batch.append(self.write_queue.get_nowait())
             
+            try:
+                await self.write_rows([row for rows, _ in batch for row in rows])
+            finally:
+                for _, done in batch:
+                    if not done.done():
+                        done.set_result(None)
+    
+    async def write_rows(self, rows: List[Tuple]):
+        """Insert post rows in a single transaction."""
+        db = await self.get_db()
+        try:
+            await db.executemany(_SQL_INSERT_POST, rows)
             await db.commit()
+            self.read_cache.clear()
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"Error storing {len(rows)} items: {e}")
     
     async def get_current_stats(self) -> Dict[str, Any]:
         """Get current sentiment statistics."""
-        async with aiosqlite.connect(self.db_path) as db:
-            # Get total mentions in last 24 hours
-            cursor = await db.execute("""
-                SELECT COUNT(*) FROM posts 
-                WHERE timestamp > datetime('now', '-24 hours')
-            """)
-            total_mentions = (await cursor.fetchone())[0]
-            
-            # Get sentiment distribution
-            cursor = await db.execute("""
-                SELECT sentiment, COUNT(*) FROM posts 
-                WHERE timestamp > datetime('now', '-24 hours') AND sentiment IS NOT NULL
-                GROUP BY sentiment
-            """)
-            sentiment_counts = await cursor.fetchall()
-            
-            # Calculate percentages
-            total_with_sentiment = sum(count for _, count in sentiment_counts)
-            sentiment_stats = {'positive': 0, 'negative': 0, 'neutral': 0}
-            
-            if total_with_sentiment > 0:
-                for sentiment, count in sentiment_counts:
-                    if sentiment in sentiment_stats:
-                        sentiment_stats[sentiment] = round((count / total_with_sentiment) * 100, 1)
-            
-            return {
-                'total_mentions': total_mentions,
-                'positive': sentiment_stats['positive'],
-                'negative': sentiment_stats['negative'],
-                'neutral': sentiment_stats['neutral'],
-                'last_updated': datetime.utcnow()
-            }
+        return await self.read_cache.get_or_compute('stats', self._query_current_stats)
     
     async def get_recent_feed(self, limit: int = 20) -> List[Dict[str, Any]]:
         """Get recent posts for the feed."""
-        async with aiosqlite.connect(self.db_path) as db:
-            cursor = await db.execute("""
-                SELECT id, source, content, url, timestamp, sentiment, confidence
-                FROM posts
-                WHERE sentiment IS NOT NULL
-                ORDER BY timestamp DESC
-                LIMIT ?
-            """, (limit,))
-
-            rows = await cursor.fetchall()
-
-            feed_items = []
-            for row in rows:
-                feed_items.append({
-                    'id': row[0],
-                    'source': row[1],
-                    'text': row[2][:200] + '...' if len(row[2]) > 200 else row[2],
-                    'url': row[3],
-                    'timestamp': datetime.fromisoformat(row[4]) if isinstance(row[4], str) else row[4],
-                    'sentiment': row[5],
-                    'confidence': row[6] or 0.0
-                })
-
-            return feed_items
-
+        return await self.read_cache.get_or_compute(('feed', limit), lambda: self._query_recent_feed(limit))
+    
     async def get_trend_data(self, hours: int = 24) -> Dict[str, Any]:
         """Get trend data for charts."""
-        async with aiosqlite.connect(self.db_path) as db:
-            # Get hourly sentiment counts
-            cursor = await db.execute("""
-                SELECT
-                    strftime('%Y-%m-%d %H:00:00', timestamp) as hour,
-                    sentiment,
-                    COUNT(*) as count
-                FROM posts
-                WHERE timestamp > datetime('now', '-{} hours')
-                AND sentiment IS NOT NULL
-                GROUP BY hour, sentiment
-                ORDER BY hour
-            """.format(hours))
-
-            rows = await cursor.fetchall()
-
-            # Process data for chart format
-            hours_data = {}
-            for row in rows:
-                hour = row[0]
-                sentiment = row[1]
-                count = row[2]
-
-                if hour not in hours_data:
-                    hours_data[hour] = {'positive': 0, 'negative': 0, 'neutral': 0}
-
-                if sentiment in hours_data[hour]:
-                    hours_data[hour][sentiment] = count
-
-            # Create chart data
-            sorted_hours = sorted(hours_data.keys())
-            labels = [datetime.fromisoformat(h).strftime('%H:00') for h in sorted_hours[-7:]]  # Last 7 hours
-
-            positive_data = [hours_data.get(h, {}).get('positive', 0) for h in sorted_hours[-7:]]
-            negative_data = [hours_data.get(h, {}).get('negative', 0) for h in sorted_hours[-7:]]
-
-            return {
-                'labels': labels,
-                'datasets': [
-                    {
-                        'label': 'Positive',
-                        'data': positive_data,
-                        'borderColor': '#22c55e',
-                        'backgroundColor': 'rgba(34, 197, 94, 0.1)',
-                        'fill': True,
-                        'tension': 0.4,
-                    },
-                    {
-                        'label': 'Negative',
-                        'data': negative_data,
-                        'borderColor': '#ef4444',
-                        'backgroundColor': 'rgba(239, 68, 68, 0.1)',
-                        'fill': True,
-                        'tension': 0.4,
-                    },
-                ]
-            }
+        return await self.read_cache.get_or_compute(('trend', hours), lambda: self._query_trend_data(hours))
+    
+    async def _query_current_stats(self) -> Dict[str, Any]:
+        """Read current sentiment statistics from the database."""
+        db = await self.get_db()
+        cursor = await db.execute(_SQL_CURRENT_STATS)
+        sentiment_counts = await cursor.fetchall()
+        
+        total_mentions = sum(count for _, count in sentiment_counts)
+        
+        # Calculate percentages
+        total_with_sentiment = sum(count for sentiment, count in sentiment_counts if sentiment is not None)
+        sentiment_stats = {'positive': 0, 'negative': 0, 'neutral': 0}
+        
+        if total_with_sentiment > 0:
+            for sentiment, count in sentiment_counts:
+                if sentiment in sentiment_stats:
+                    sentiment_stats[sentiment] = round((count / total_with_sentiment) * 100, 1)
+        
+        return {
+            'total_mentions': total_mentions,
+            'positive': sentiment_stats['positive'],
+            'negative': sentiment_stats['negative'],
+            'neutral': sentiment_stats['neutral'],
+            'last_updated': datetime.utcnow()
+        }
+    
+    async def _query_recent_feed(self, limit: int) -> List[Dict[str, Any]]:
+        """Read recent analyzed posts from the database."""
+        db = await self.get_db()
+        cursor = await db.execute(_SQL_RECENT_FEED, (limit,))
+
+        rows = await cursor.fetchall()
+
+        # Column names match the feed keys; timestamps stay ISO strings for FeedItem to parse
+        return [dict(row) for row in rows]
+
+    async def _query_trend_data(self, hours: int) -> Dict[str, Any]:
+        """Read hourly sentiment counts from the database."""
+        db = await self.get_db()
+        cursor = await db.execute(_SQL_HOURLY_TREND, (int(hours) * 3600,))
+
+        rows = list(reversed(await cursor.fetchall()))
+
+        # Create chart data (UTC hour of day)
+        labels = [f"{row[0] % 24:02d}:00" for row in rows]
+        positive_data = [row[1] for row in rows]
+        negative_data = [row[2] for row in rows]
+
+        return {
+            'labels': labels,
+            'datasets': [
+                {
+                    'label': 'Positive',
+                    'data': positive_data,
+                    'borderColor': '#22c55e',
+                    'backgroundColor': 'rgba(34, 197, 94, 0.1)',
+                    'fill': True,
+                    'tension': 0.4,
+                },
+                {
+                    'label': 'Negative',
+                    'data': negative_data,
+                    'borderColor': '#ef4444',
+                    'backgroundColor': 'rgba(239, 68, 68, 0.1)',
+                    'fill': True,
+                    'tension': 0.4,
+                },
+            ]
+        }
 
     async def get_negative_posts(self, limit: int = 5) -> List[Dict[str, Any]]:
         """Get recent negative sentiment posts for AI response generation."""
-        async with aiosqlite.connect(self.db_path) as db:
-            cursor = await db.execute("""
-                SELECT id, source, content, url, timestamp, confidence
-                FROM posts
-                WHERE sentiment = 'negative'
-                AND timestamp > datetime('now', '-24 hours')
-                ORDER BY confidence DESC, timestamp DESC
-                LIMIT ?
-            """, (limit,))
-
-            rows = await cursor.fetchall()
-
-            posts = []
-            for row in rows:
-                posts.append({
-                    'id': row[0],
-                    'source': row[1],
-                    'content': row[2],
-                    'url': row[3],
-                    'timestamp': datetime.fromisoformat(row[4]) if isinstance(row[4], str) else row[4],
-                    'confidence': row[5] or 0.0
-                })
+        db = await self.get_db()
+        cursor = await db.execute(_SQL_NEGATIVE_POSTS, (limit,))
 
-            return posts
+        # Column names match the post keys
+        return [dict(row) for row in await cursor.fetchall()]
 
     async def cleanup(self):
         """Cleanup resources."""
+        if self.writer_task:
+            self.writer_task.cancel()
+            try:
+                await self.writer_task
+            except asyncio.CancelledError:
+                pass
+            self.writer_task = None
+        
+        # Flush writes queued after the writer's last drain
+        while self.write_queue and not self.write_queue.empty():
+            rows, done = self.write_queue.get_nowait()
+            await self.write_rows(rows)
+            if not done.done():
+                done.set_result(None)
+        
         if self.session:
             await self.session.close()
         if self.reddit_client:
             await self.reddit_client.close()
+        if self.db:
+            await self.db.close()
+            self.db = None
@@ -0,0 +1,63 @@
+"""
+Database helpers for EchoSense
+Shared SQLite connection setup used by the backend services.
+"""
+
+import calendar
+import logging
+import sqlite3
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import AsyncIterator
+
+import aiosqlite
+
+logger = logging.getLogger(__name__)
+
+# Applied to every long-lived connection: WAL lets readers proceed during writes
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",  # 256MB memory-mapped reads
+    "PRAGMA cache_size=-65536",    # 64MB page cache
+)
+
+# Prepared statements kept per connection (sqlite3 defaults to 128)
+STATEMENT_CACHE_SIZE = 256
+
+
+async def open_connection(db_path: str) -> aiosqlite.Connection:
+    """Open a long-lived SQLite connection with the shared PRAGMAs applied."""
+    db = await aiosqlite.connect(db_path, cached_statements=STATEMENT_CACHE_SIZE)
+    for pragma in CONNECTION_PRAGMAS:
+        await db.execute(pragma)
+    logger.debug(f"Opened SQLite connection to {db_path}")
+    return db
+
+
+@asynccontextmanager
+async def connection(db_path: str) -> AsyncIterator[aiosqlite.Connection]:
+    """Short-lived connection with the shared PRAGMAs applied, closed on exit."""
+    db = await open_connection(db_path)
+    try:
+        yield db
+    finally:
+        await db.close()
+
+
+def connect(db_path: str) -> sqlite3.Connection:
+    """Open a blocking SQLite connection with the shared PRAGMAs applied.
+
+    The connection may only be used from the thread that opened it.
+    """
+    db = sqlite3.connect(db_path, cached_statements=STATEMENT_CACHE_SIZE)
+    for pragma in CONNECTION_PRAGMAS:
+        db.execute(pragma)
+    logger.debug(f"Opened SQLite connection to {db_path}")
+    return db
+
+
+def epoch_seconds(ts: datetime) -> int:
+    """UNIX seconds for a timestamp; naive values are taken to be UTC like ``datetime.utcnow()``."""
+    return calendar.timegm(ts.utctimetuple())
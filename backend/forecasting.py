@@ -1,30 +1,94 @@
 """
 Forecasting Service for EchoSense
-Uses Facebook Prophet for time series forecasting of sentiment trends.
+Uses Holt-Winters exponential smoothing for time series forecasting of sentiment trends.
 """
 
 import asyncio
 import logging
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
+from statistics import NormalDist
+from typing import Dict, List, Any, Optional, Tuple
 import pandas as pd
 import numpy as np
-from prophet import Prophet
+from statsmodels.tsa.holtwinters import ExponentialSmoothing
 import aiosqlite
 
+from .caching import TTLCache
 from .config import settings
+from .database import open_connection
 
 logger = logging.getLogger(__name__)
 
+SEASONAL_PERIODS = 24  # Hourly data with a daily cycle
+
+
+def summarize_forecast(yhat: np.ndarray, lower: np.ndarray, upper: np.ndarray) -> Tuple[float, float, float]:
+    """Mean, least-squares slope and mean interval width of a forecast.
+
+    The slope is in closed form: with x = 0..n-1 centred on its mean it is
+    dot(x, y) / sum(x ** 2), and that denominator is n * (n**2 - 1) / 12.
+    Each quantity is a single reduction over the arrays, with no design
+    matrix or intermediate difference array.
+    """
+    n = len(yhat)
+    if n == 0:
+        return 0.0, 0.0, 0.0
+    
+    avg = float(yhat.sum()) / n
+    uncertainty = (float(upper.sum()) - float(lower.sum())) / n
+    if n < 2:
+        return avg, 0.0, uncertainty
+    
+    centred = np.arange(n, dtype=np.float64) - (n - 1) / 2.0
+    slope = float(centred @ yhat) / (n * (n * n - 1) / 12.0)
+    return avg, slope, uncertainty
+
+
+def fit_forecast(series: pd.Series, horizon: int, interval_width: float) -> pd.DataFrame:
+    """Fit additive Holt-Winters to an hourly series and forecast the next ``horizon`` hours.
+
+    The interval is the forecast +/- the in-sample residual standard deviation
+    scaled to ``interval_width``. The trend is damped and values are clipped
+    to the [-1, 1] score range so 48-hour extrapolation stays bounded. Daily
+    seasonality needs two full cycles of history; shorter series get a
+    trend-only fit.
+    """
+    seasonal = 'add' if len(series) >= 2 * SEASONAL_PERIODS else None
+    model = ExponentialSmoothing(
+        series,
+        trend='add',
+        damped_trend=True,
+        seasonal=seasonal,
+        seasonal_periods=SEASONAL_PERIODS if seasonal else None
+    ).fit()
+    
+    yhat = model.forecast(horizon).clip(-1.0, 1.0)
+    band = NormalDist().inv_cdf(0.5 + interval_width / 2) * float(np.std(model.resid))
+    return pd.DataFrame({
+        'yhat': yhat,
+        'yhat_lower': (yhat - band).clip(lower=-1.0),
+        'yhat_upper': (yhat + band).clip(upper=1.0)
+    })
+
 
 class ForecastingService:
-    """Service for generating sentiment forecasts using Prophet."""
+    """Service for generating sentiment forecasts using exponential smoothing."""
     
     def __init__(self):
         self.db_path = "echosense.db"
-        self.model: Optional[Prophet] = None
+        # Forecast horizon (yhat, yhat_lower, yhat_upper per future hour) from the last training
+        self.forecast: Optional[pd.DataFrame] = None
         self.last_training_time: Optional[datetime] = None
+        # (latest hour, hours, posts) of the data behind the current forecast
+        self.training_watermark: Optional[Tuple[int, int, int]] = None
         self.training_interval = timedelta(hours=6)  # Retrain every 6 hours
+        self.train_lock = asyncio.Lock()
+        self.db: Optional[aiosqlite.Connection] = None
+        self.db_lock = asyncio.Lock()
+        # The forecast only changes on retrain; concurrent requests share one summary
+        self.forecast_cache = TTLCache(ttl=settings.forecast_cache_ttl, maxsize=1)
+        # While in fallback mode the 24-hour aggregate is reused until the next retrain is due
+        self.fallback_cache = TTLCache(ttl=self.training_interval.total_seconds(), maxsize=1)
         
     async def initialize(self):
         """Initialize the forecasting service."""
@@ -41,7 +105,7 @@ class ForecastingService:
             logger.warning("Using fallback forecasting mode")
     
     async def train_model(self):
-        """Train the Prophet model with historical data."""
+        """Fit the smoothing model on historical data and forecast the horizon."""
         logger.info("Training forecasting model...")
         
         try:
@@ -52,92 +116,98 @@ class ForecastingService:
                 logger.warning("Insufficient historical data for training. Using fallback mode.")
                 return
             
-            # Prepare data for Prophet
-            df = pd.DataFrame(historical_data)
-            df['ds'] = pd.to_datetime(df['timestamp'])
-            df['y'] = df['sentiment_score']
-            
-            # Create and train model
-            self.model = Prophet(
-                daily_seasonality=True,
-                weekly_seasonality=True,
-                yearly_seasonality=False,
-                interval_width=settings.confidence_interval,
-                changepoint_prior_scale=0.05,  # More flexible to trend changes
-                seasonality_prior_scale=10.0,  # More flexible to seasonality
+            # Refitting on identical data would reproduce the same forecast
+            watermark = (
+                int(historical_data[-1, 0]),
+                len(historical_data),
+                int(historical_data[:, 2].sum())
             )
+            if self.forecast is not None and watermark == self.training_watermark:
+                self.last_training_time = datetime.utcnow()
+                logger.info("Historical data unchanged since last training, keeping current forecast")
+                return
             
-            # Run training in executor to avoid blocking
-            await asyncio.get_event_loop().run_in_executor(
-                None, self.model.fit, df
-            )
+            # Prepare an evenly spaced hourly series, interpolating hours with too few posts
+            series = pd.Series(
+                historical_data[:, 1],
+                index=pd.to_datetime(historical_data[:, 0].astype(np.int64), unit='s')
+            ).asfreq(pd.offsets.Hour()).interpolate(limit_direction='both')
             
+            # Fitting takes milliseconds; a worker thread keeps even that off the event loop
+            self.forecast = await asyncio.to_thread(
+                fit_forecast, series, settings.forecast_hours, settings.confidence_interval
+            )
             self.last_training_time = datetime.utcnow()
+            self.training_watermark = watermark
+            self.forecast_cache.clear()
+            self.fallback_cache.clear()
             logger.info("Model training completed successfully")
             
         except Exception as e:
             logger.error(f"Error training model: {e}")
-            self.model = None
+            self.forecast = None
     
-    async def get_historical_sentiment_data(self) -> List[Dict[str, Any]]:
-        """Get historical sentiment data for training."""
-        async with aiosqlite.connect(self.db_path) as db:
-            # Get hourly sentiment averages for the last 30 days
-            cursor = await db.execute("""
-                SELECT 
-                    strftime('%Y-%m-%d %H:00:00', timestamp) as hour,
-                    AVG(CASE 
-                        WHEN sentiment = 'positive' THEN 1.0
-                        WHEN sentiment = 'negative' THEN -1.0
-                        ELSE 0.0
-                    END) as sentiment_score,
-                    COUNT(*) as count
-                FROM posts 
-                WHERE timestamp > datetime('now', '-30 days') 
-                AND sentiment IS NOT NULL
-                GROUP BY hour
-                HAVING count >= 3  -- Only include hours with sufficient data
-                ORDER BY hour
-            """)
-            
-            rows = await cursor.fetchall()
-            
-            return [
-                {
-                    'timestamp': row[0],
-                    'sentiment_score': row[1],
-                    'count': row[2]
-                }
-                for row in rows
-            ]
+    def training_due(self) -> bool:
+        """Whether the model has never been trained or the training interval has passed."""
+        return (self.last_training_time is None or
+                datetime.utcnow() - self.last_training_time > self.training_interval)
+    
+    async def get_db(self) -> aiosqlite.Connection:
+        """Return the shared database connection, opening it on first use."""
+        async with self.db_lock:
+            if self.db is None:
+                self.db = await open_connection(self.db_path)
+        return self.db
+    
+    async def get_historical_sentiment_data(self) -> np.ndarray:
+        """Get historical sentiment data for training.
+        
+        Returns an (hours, 3) float array of hour start (epoch seconds),
+        average sentiment score and post count, oldest first.
+        """
+        db = await self.get_db()
+        # Hourly sentiment averages for the last 30 days, read from the rollup
+        # that ingestion keeps up to date (hour = epoch seconds / 3600)
+        rows = await db.execute_fetchall("""
+            SELECT 
+                hour * 3600 as hour_start,
+                sum_score / count as sentiment_score,
+                count
+            FROM hourly_sentiment 
+            WHERE hour > (strftime('%s', 'now') - 30 * 86400) / 3600 
+            AND count >= 3  -- Only include hours with sufficient data
+            ORDER BY hour
+        """)
+        
+        return np.array(rows, dtype=np.float64).reshape(-1, 3)
     
     async def generate_forecast(self) -> Dict[str, Any]:
         """Generate 48-hour sentiment forecast."""
+        return await self.forecast_cache.get_or_compute('forecast', self._generate_forecast)
+    
+    async def _generate_forecast(self) -> Dict[str, Any]:
+        """Retrain if due, then summarize the forecast horizon."""
         try:
-            # Check if model needs retraining
-            if (self.last_training_time is None or 
-                datetime.utcnow() - self.last_training_time > self.training_interval):
-                await self.train_model()
+            # Check if model needs retraining; the lock and second check keep
+            # concurrent requests from starting more than one fit
+            if self.training_due():
+                async with self.train_lock:
+                    if self.training_due():
+                        await self.train_model()
             
-            if self.model is None:
+            if self.forecast is None:
                 return await self.generate_fallback_forecast()
             
-            # Create future dataframe
-            future_periods = settings.forecast_hours
-            future = self.model.make_future_dataframe(periods=future_periods, freq='H')
-            
-            # Generate forecast
-            forecast = await asyncio.get_event_loop().run_in_executor(
-                None, self.model.predict, future
-            )
-            
-            # Get the forecast for the next 48 hours
-            future_forecast = forecast.tail(future_periods)
+            # The forecast for the next 48 hours was computed at training time;
+            # pull its columns out once as float64 arrays (row views of the transpose)
+            future_forecast = self.forecast
+            values = future_forecast[['yhat', 'yhat_lower', 'yhat_upper']].to_numpy(dtype=np.float64).T
+            yhat, lower, upper = values
             
             # Analyze forecast
-            avg_forecast = future_forecast['yhat'].mean()
-            trend_direction = self.analyze_trend(future_forecast['yhat'].values)
-            confidence_score = self.calculate_confidence(future_forecast)
+            avg_forecast, slope, uncertainty = summarize_forecast(yhat, lower, upper)
+            trend_direction = self.analyze_trend(slope)
+            confidence_score = self.calculate_confidence(uncertainty)
             
             # Determine overall sentiment
             if avg_forecast > 0.2:
@@ -161,9 +231,9 @@ class ForecastingService:
                 'confidence_score': float(confidence_score),
                 'forecast_data': {
                     'timestamps': future_forecast.index.tolist(),
-                    'values': future_forecast['yhat'].tolist(),
-                    'lower_bound': future_forecast['yhat_lower'].tolist(),
-                    'upper_bound': future_forecast['yhat_upper'].tolist()
+                    'values': yhat.tolist(),
+                    'lower_bound': lower.tolist(),
+                    'upper_bound': upper.tolist()
                 }
             }
             
@@ -172,28 +242,14 @@ class ForecastingService:
             return await self.generate_fallback_forecast()
     
     async def generate_fallback_forecast(self) -> Dict[str, Any]:
-        """Generate a simple fallback forecast when Prophet model is unavailable."""
+        """Generate a simple fallback forecast when no trained forecast is available."""
         logger.info("Generating fallback forecast...")
         
         try:
             # Get recent sentiment trend
-            async with aiosqlite.connect(self.db_path) as db:
-                cursor = await db.execute("""
-                    SELECT 
-                        AVG(CASE 
-                            WHEN sentiment = 'positive' THEN 1.0
-                            WHEN sentiment = 'negative' THEN -1.0
-                            ELSE 0.0
-                        END) as avg_sentiment,
-                        COUNT(*) as total_count
-                    FROM posts 
-                    WHERE timestamp > datetime('now', '-24 hours') 
-                    AND sentiment IS NOT NULL
-                """)
-                
-                row = await cursor.fetchone()
-                avg_sentiment = row[0] if row[0] is not None else 0.0
-                total_count = row[1]
+            avg_sentiment, total_count = await self.fallback_cache.get_or_compute(
+                'recent_sentiment', self.get_recent_sentiment
+            )
             
             # Determine forecast based on recent trend
             if total_count < 10:
@@ -239,15 +295,20 @@ class ForecastingService:
                 'confidence_score': 0.2
             }
     
-    def analyze_trend(self, values: np.ndarray) -> str:
-        """Analyze trend direction from forecast values."""
-        if len(values) < 2:
-            return 'stable'
-        
-        # Calculate trend using linear regression
-        x = np.arange(len(values))
-        slope = np.polyfit(x, values, 1)[0]
-        
+    async def get_recent_sentiment(self) -> Tuple[float, int]:
+        """Average sentiment score and number of analyzed posts over the last 24 hours."""
+        db = await self.get_db()
+        (row,) = await db.execute_fetchall("""
+            SELECT 
+                AVG(sentiment_score) as avg_sentiment,
+                COUNT(sentiment_score) as total_count
+            FROM posts 
+            WHERE ts_epoch > strftime('%s', 'now') - 86400
+        """)
+        return (row[0] if row[0] is not None else 0.0), row[1]
+    
+    def analyze_trend(self, slope: float) -> str:
+        """Classify the trend direction from the forecast's per-hour slope."""
         if slope > 0.05:
             return 'improving'
         elif slope < -0.05:
@@ -255,11 +316,8 @@ class ForecastingService:
         else:
             return 'stable'
     
-    def calculate_confidence(self, forecast_df: pd.DataFrame) -> float:
-        """Calculate confidence score based on forecast uncertainty."""
-        # Use the width of confidence intervals as uncertainty measure
-        uncertainty = (forecast_df['yhat_upper'] - forecast_df['yhat_lower']).mean()
-        
+    def calculate_confidence(self, uncertainty: float) -> float:
+        """Calculate confidence score from the mean confidence interval width."""
         # Convert to confidence score (lower uncertainty = higher confidence)
         confidence = max(0.0, min(1.0, 1.0 - (uncertainty / 2.0)))
         
@@ -298,5 +356,8 @@ class ForecastingService:
     
     async def cleanup(self):
         """Cleanup resources."""
-        self.model = None
+        self.forecast = None
+        if self.db:
+            await self.db.close()
+            self.db = None
         logger.info("Forecasting Service cleaned up")
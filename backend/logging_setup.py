@@ -0,0 +1,50 @@
+"""
+Logging setup for EchoSense
+Callers only enqueue records; a listener thread does the console and file writes.
+"""
+
+import atexit
+import logging
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional
+
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+LOG_FILE = "echosense.log"
+
+# One queue and listener per process, shared by every configuration pass in it
+_queue_handler: Optional[QueueHandler] = None
+
+
+def queue_handler() -> QueueHandler:
+    """Return this process's QueueHandler, starting its listener thread on first use.
+
+    Built through ``log_config`` in every process, uvicorn worker processes
+    included, so no process enqueues records that nothing drains.
+    """
+    global _queue_handler
+    if _queue_handler is None:
+        formatter = logging.Formatter(LOG_FORMAT)
+        handlers = [logging.StreamHandler(sys.stdout), logging.FileHandler(LOG_FILE)]
+        for handler in handlers:
+            handler.setFormatter(formatter)
+
+        log_queue = queue.SimpleQueue()
+        listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        listener.start()
+        # Registered after logging's own exit hook, so queued records are flushed first
+        atexit.register(listener.stop)
+        _queue_handler = QueueHandler(log_queue)
+
+    return _queue_handler
+
+
+def log_config(level: str) -> Dict[str, Any]:
+    """dictConfig routing the root logger, and uvicorn's loggers through it, to the queue."""
+    return {
+        "version": 1,
+        "disable_existing_loggers": False,
+        "handlers": {"queue": {"()": queue_handler}},
+        "root": {"level": level.upper(), "handlers": ["queue"]},
+    }
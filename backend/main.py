@@ -5,15 +5,22 @@ FastAPI-based REST API for brand perception analysis.
 
 import asyncio
 import logging
+import time
 from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import Dict, List, Optional
+from operator import itemgetter
+from typing import IO, Dict, List, Optional
 
 from fastapi import FastAPI, HTTPException, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
 from .config import settings
 from .data_ingestion import DataIngestionService
 from .sentiment_analysis import SentimentAnalysisService
@@ -46,6 +53,27 @@ ai_service: Optional[AIAgentService] = None
 # Background task for continuous data collection
 background_task: Optional[asyncio.Task] = None
 
+# With several server workers, only the one holding this lock runs continuous monitoring
+MONITOR_LOCK_FILE = "echosense.monitor.lock"
+MONITOR_LOCK_SUPPORTED = fcntl is not None
+SCHEMA_LOCK_FILE = "echosense.schema.lock"
+
+# Cadence of the slower monitoring jobs, in seconds
+CRISIS_DETECTION_INTERVAL = 5 * 60
+TOPIC_EXTRACTION_INTERVAL = 30 * 60
+
+# Mock emotion distribution served by /api/emotions until it is computed from recent
+# posts; built and summarized once at import instead of on every request
+MOCK_EMOTIONS: Dict[str, float] = {
+    'joy': 0.35,
+    'sadness': 0.15,
+    'anger': 0.10,
+    'fear': 0.08,
+    'surprise': 0.20,
+    'disgust': 0.12
+}
+MOCK_DOMINANT_EMOTION, MOCK_EMOTION_CONFIDENCE = max(MOCK_EMOTIONS.items(), key=itemgetter(1))
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -53,6 +81,7 @@ async def lifespan(app: FastAPI):
     global data_service, sentiment_service, advanced_sentiment_service, crisis_service, topic_service, forecast_service, ai_service, background_task
 
     logger.info("Starting EchoSense Backend Services...")
+    monitor_lock = None
 
     try:
         # Initialize services
@@ -68,19 +97,24 @@ async def lifespan(app: FastAPI):
         else:
             ai_service = None
 
-        # Initialize services
-        await data_service.initialize()
+        # Initialize services; those owning database schemas migrate one worker at a time
+        async with schema_lock():
+            await data_service.initialize()
+            await crisis_service.initialize()
+            await topic_service.initialize()
         await sentiment_service.initialize()
         await advanced_sentiment_service.initialize()
-        await crisis_service.initialize()
-        await topic_service.initialize()
         await forecast_service.initialize()
 
         if ai_service:
             await ai_service.initialize()
 
-        # Start background data collection and monitoring
-        background_task = asyncio.create_task(continuous_monitoring())
+        # Start background data collection and monitoring, once across worker processes
+        monitor_lock = acquire_monitor_lock()
+        if monitor_lock:
+            background_task = asyncio.create_task(continuous_monitoring())
+        else:
+            logger.info("Continuous monitoring is running in another worker")
 
         logger.info("All services initialized successfully")
 
@@ -99,6 +133,8 @@ async def lifespan(app: FastAPI):
                 await background_task
             except asyncio.CancelledError:
                 pass
+        if monitor_lock:
+            monitor_lock.close()
 
         # Cleanup services
         if data_service:
@@ -124,6 +160,8 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    # orjson renders responses straight to bytes, several times faster than stdlib json
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -211,9 +249,36 @@ class HealthResponse(BaseModel):
     version: str
 
 
+def acquire_monitor_lock() -> Optional[IO]:
+    """Take the monitoring lock without waiting; returns the open lock file, or None if another worker holds it."""
+    lock_file = open(MONITOR_LOCK_FILE, "w")
+    if fcntl is None:
+        # Single-process only: run_backend refuses multiple workers without locking
+        return lock_file
+    
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock_file.close()
+        return None
+    return lock_file
+
+
+@asynccontextmanager
+async def schema_lock():
+    """Wait for the exclusive schema lock, held while a worker creates and migrates tables."""
+    with open(SCHEMA_LOCK_FILE, "w") as lock_file:
+        if fcntl is not None:
+            await asyncio.to_thread(fcntl.flock, lock_file, fcntl.LOCK_EX)
+        # Closing the file releases the lock
+        yield
+
+
 async def continuous_monitoring():
     """Background task for continuous data collection and monitoring."""
     logger.info("Starting continuous monitoring...")
+    # Monotonic deadlines: each job runs once when due, regardless of loop timing
+    next_crisis_run = next_topic_run = time.monotonic()
 
     while True:
         try:
@@ -223,29 +288,32 @@ async def continuous_monitoring():
                 new_data = await data_service.collect_all_sources()
 
                 if new_data:
-                    # Enhanced analysis with language and emotion detection
-                    analyzed_data = []
-                    for item in new_data:
-                        analysis = await advanced_sentiment_service.analyze_with_language_and_emotion(item['content'])
+                    # Enhanced analysis with language and emotion detection, one language
+                    # detection call and batched forward passes for the whole collection
+                    analyses = await advanced_sentiment_service.analyze_batch_with_language_and_emotion(
+                        [post.content for post in new_data]
+                    )
 
-                        # Merge analysis results with original item
-                        enhanced_item = {**item, **analysis}
-                        analyzed_data.append(enhanced_item)
+                    # Record the stored analysis columns on each post
+                    for post, analysis in zip(new_data, analyses):
+                        post.sentiment = analysis['sentiment']
+                        post.confidence = analysis['sentiment_confidence']
 
                     # Store analyzed data
-                    await data_service.store_analyzed_data(analyzed_data)
+                    await data_service.store_analyzed_data(new_data)
 
-                    logger.info(f"Processed {len(analyzed_data)} new items with enhanced analysis")
+                    logger.info(f"Processed {len(new_data)} new items with enhanced analysis")
 
             # Crisis detection cycle (every 5 minutes)
-            if crisis_service:
+            if crisis_service and time.monotonic() >= next_crisis_run:
+                next_crisis_run = time.monotonic() + CRISIS_DETECTION_INTERVAL
                 alerts = await crisis_service.detect_anomalies()
                 if alerts:
                     logger.info(f"Detected {len(alerts)} new alerts")
 
             # Topic extraction cycle (every 30 minutes)
-            current_minute = datetime.utcnow().minute
-            if topic_service and current_minute % 30 == 0:
+            if topic_service and time.monotonic() >= next_topic_run:
+                next_topic_run = time.monotonic() + TOPIC_EXTRACTION_INTERVAL
                 await topic_service.extract_topics()
                 logger.info("Topic extraction completed")
 
@@ -301,7 +369,7 @@ async def get_stats():
         raise HTTPException(status_code=500, detail="Failed to retrieve stats")
 
 
-@app.get("/api/feed", response_model=List[FeedItem])
+@app.api_route("/api/feed", methods=["GET", "HEAD"], response_model=List[FeedItem])
 async def get_feed(limit: int = 20):
     """Get real-time sentiment feed data."""
     if not data_service:
@@ -315,7 +383,7 @@ async def get_feed(limit: int = 20):
         raise HTTPException(status_code=500, detail="Failed to retrieve feed")
 
 
-@app.get("/api/trends", response_model=TrendData)
+@app.api_route("/api/trends", methods=["GET", "HEAD"], response_model=TrendData)
 async def get_trends(hours: int = 24):
     """Get historical trend data for charts."""
     if not data_service:
@@ -329,7 +397,7 @@ async def get_trends(hours: int = 24):
         raise HTTPException(status_code=500, detail="Failed to retrieve trends")
 
 
-@app.get("/api/forecast", response_model=ForecastResponse)
+@app.api_route("/api/forecast", methods=["GET", "HEAD"], response_model=ForecastResponse)
 async def get_forecast():
     """Get 48-hour sentiment predictions."""
     if not forecast_service:
@@ -343,7 +411,7 @@ async def get_forecast():
         raise HTTPException(status_code=500, detail="Failed to generate forecast")
 
 
-@app.get("/api/ai-responses", response_model=List[AIResponse])
+@app.api_route("/api/ai-responses", methods=["GET", "HEAD"], response_model=List[AIResponse])
 async def get_ai_responses(limit: int = 10):
     """Get recent AI-generated responses."""
     if not ai_service:
@@ -368,7 +436,7 @@ async def generate_ai_response(background_tasks: BackgroundTasks):
         negative_posts = await data_service.get_negative_posts(limit=5)
         
         if not negative_posts:
-            return JSONResponse(
+            return ORJSONResponse(
                 content={"message": "No negative posts found to respond to"},
                 status_code=200
             )
@@ -376,7 +444,7 @@ async def generate_ai_response(background_tasks: BackgroundTasks):
         # Generate responses in background
         background_tasks.add_task(ai_service.generate_responses_for_posts, negative_posts)
         
-        return JSONResponse(
+        return ORJSONResponse(
             content={"message": f"AI response generation started for {len(negative_posts)} posts"},
             status_code=202
         )
@@ -396,21 +464,10 @@ async def get_emotions():
 
     try:
         # Mock emotion data for now - would be calculated from recent posts
-        emotions = {
-            'joy': 0.35,
-            'sadness': 0.15,
-            'anger': 0.10,
-            'fear': 0.08,
-            'surprise': 0.20,
-            'disgust': 0.12
-        }
-
-        dominant_emotion = max(emotions, key=emotions.get)
-
         return EmotionData(
-            emotions=emotions,
-            dominant_emotion=dominant_emotion,
-            confidence=emotions[dominant_emotion],
+            emotions=MOCK_EMOTIONS,
+            dominant_emotion=MOCK_DOMINANT_EMOTION,
+            confidence=MOCK_EMOTION_CONFIDENCE,
             timestamp=datetime.utcnow()
         )
     except Exception as e:
@@ -418,6 +475,15 @@ async def get_emotions():
         raise HTTPException(status_code=500, detail="Failed to retrieve emotion data")
 
 
+@app.get("/api/cache-stats")
+async def get_cache_stats():
+    """Get hit-rate statistics for the inference result caches."""
+    if not advanced_sentiment_service:
+        raise HTTPException(status_code=503, detail="Advanced sentiment service unavailable")
+
+    return advanced_sentiment_service.get_cache_stats()
+
+
 @app.get("/api/topics", response_model=List[TopicData])
 async def get_topics(limit: int = 10):
     """Get current trending topics."""
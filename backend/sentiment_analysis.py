@@ -5,23 +5,126 @@ Uses Hugging Face DistilBERT for advanced sentiment classification.
 
 import asyncio
 import logging
-from typing import Dict, List, Any, Optional
+import os
+import re
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, List, Any, Optional, Tuple
 import random
 
-from .config import settings
+from .batching import MicroBatcher
+from .config import SEQUENCE_BUCKETS, settings
 
 # Try to import ML libraries, fall back to mock implementation if not available
 try:
     import torch
-    from transformers import AutoTokenizer, AutoModelForSequenceClassification, pipeline
+    from transformers import AutoTokenizer, AutoModelForSequenceClassification
     import numpy as np
     ML_AVAILABLE = True
 except ImportError:
     ML_AVAILABLE = False
     torch = None
 
+try:
+    from optimum.onnxruntime import ORTModelForSequenceClassification
+    OPTIMUM_AVAILABLE = True
+except ImportError:
+    OPTIMUM_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+# Result used when a text cannot be analyzed
+FALLBACK_RESULT = {
+    'sentiment': 'neutral',
+    'confidence': 0.5,
+    'all_scores': {'neutral': 0.5}
+}
+
+
+def fallback_result() -> Dict[str, Any]:
+    """Fresh copy of FALLBACK_RESULT, so callers may mutate it without touching the template."""
+    return {**FALLBACK_RESULT, 'all_scores': dict(FALLBACK_RESULT['all_scores'])}
+
+
+# Map model labels to our standard format
+LABEL_MAPPING = {
+    'positive': 'positive',
+    'negative': 'negative',
+    'neutral': 'neutral',
+    'label_1': 'negative',  # DistilBERT uses LABEL_0/LABEL_1
+    'label_0': 'positive'
+}
+
+# Multi-language sentiment keywords for the mock analyzer, matched against whole tokens
+SENTIMENT_KEYWORDS = {
+    'en': {
+        'positive': frozenset({'good', 'great', 'excellent', 'amazing', 'love', 'fantastic', 'awesome', 'perfect'}),
+        'negative': frozenset({'bad', 'terrible', 'awful', 'hate', 'horrible', 'worst', 'disappointing', 'broken'})
+    },
+    'es': {
+        'positive': frozenset({'bueno', 'excelente', 'increíble', 'amor', 'fantástico', 'perfecto'}),
+        'negative': frozenset({'malo', 'terrible', 'horrible', 'odio', 'peor', 'decepcionante'})
+    },
+    'fr': {
+        'positive': frozenset({'bon', 'excellent', 'incroyable', 'amour', 'fantastique', 'parfait'}),
+        'negative': frozenset({'mauvais', 'terrible', 'horrible', 'haine', 'pire', 'décevant'})
+    },
+    'de': {
+        'positive': frozenset({'gut', 'ausgezeichnet', 'erstaunlich', 'liebe', 'fantastisch', 'perfekt'}),
+        'negative': frozenset({'schlecht', 'schrecklich', 'hass', 'schlimmste', 'enttäuschend'})
+    }
+}
+
+# Common words per language for the simple language detector
+LANGUAGE_INDICATORS = {
+    'es': frozenset({'el', 'la', 'de', 'que', 'y', 'en', 'un', 'es', 'se', 'no', 'te', 'lo', 'le', 'da', 'su', 'por', 'son', 'con', 'para'}),
+    'fr': frozenset({'le', 'de', 'et', 'à', 'un', 'il', 'être', 'en', 'avoir', 'que', 'pour', 'dans', 'ce', 'son', 'une', 'sur', 'avec', 'ne', 'se'}),
+    'de': frozenset({'der', 'die', 'und', 'in', 'den', 'von', 'zu', 'das', 'mit', 'sich', 'des', 'auf', 'für', 'ist', 'im', 'dem', 'nicht', 'ein', 'eine', 'als'}),
+    'en': frozenset({'the', 'be', 'to', 'of', 'and', 'a', 'in', 'that', 'have', 'i', 'it', 'for', 'not', 'on', 'with', 'he', 'as', 'you', 'do', 'at'})
+}
+
+_TOKEN_RE = re.compile(r"\w+")
+
+# Rough characters per token, for estimating a text's sequence length without tokenizing
+CHARS_PER_TOKEN = 4
+
+
+def length_bucket(text: str) -> int:
+    """Smallest sequence bucket the text is estimated to fit in."""
+    estimate = len(text) // CHARS_PER_TOKEN
+    return next((b for b in SEQUENCE_BUCKETS if estimate <= b), SEQUENCE_BUCKETS[-1])
+
+
+def _detect_language(words: List[str]) -> str:
+    """Language whose indicator words occur most often, defaulting to English."""
+    language_scores = {
+        lang: sum(1 for word in words if word in indicators)
+        for lang, indicators in LANGUAGE_INDICATORS.items()
+    }
+    detected_lang = max(language_scores, key=language_scores.get)
+    return detected_lang if language_scores[detected_lang] > 0 else 'en'
+
+
+@lru_cache(maxsize=4096)
+def _mock_sentiment(text: str) -> Tuple[str, float, str]:
+    """Keyword-based (sentiment, confidence, language) for a text, memoized per exact string."""
+    text_lower = text.lower()
+    language = _detect_language(text_lower.split())
+
+    # Use English as fallback
+    keywords = SENTIMENT_KEYWORDS.get(language, SENTIMENT_KEYWORDS['en'])
+    tokens = set(_TOKEN_RE.findall(text_lower))
+
+    positive_count = len(tokens & keywords['positive'])
+    negative_count = len(tokens & keywords['negative'])
+
+    if positive_count > negative_count:
+        return 'positive', min(0.9, 0.6 + (positive_count * 0.1)), language
+    if negative_count > positive_count:
+        return 'negative', min(0.9, 0.6 + (negative_count * 0.1)), language
+    return 'neutral', 0.7, language
+
 
 class SentimentAnalysisService:
     """Service for analyzing sentiment using Hugging Face models."""
@@ -29,8 +132,14 @@ class SentimentAnalysisService:
     def __init__(self):
         self.model = None
         self.tokenizer = None
-        self.classifier = None
         self.device = None
+        self.compiled = False
+        # Reusable page-locked staging buffers for host-to-GPU input copies
+        self.pinned: Optional[Dict[str, Any]] = None
+        self.batcher: Optional[MicroBatcher] = None
+        # One inference thread: PyTorch's intra-op pool parallelizes each forward pass,
+        # and more callers would only oversubscribe the cores
+        self.infer_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sentiment")
         
     async def initialize(self):
         """Initialize the sentiment analysis model."""
@@ -38,7 +147,7 @@ class SentimentAnalysisService:
 
         if not ML_AVAILABLE:
             logger.warning("ML libraries not available, using mock sentiment analysis")
-            self.classifier = None
+            self.model = None
             return
 
         try:
@@ -50,35 +159,135 @@ class SentimentAnalysisService:
                 self.device = torch.device("cpu")
                 logger.info("Using CPU for sentiment analysis")
 
+            if settings.torch_threads > 0:
+                torch.set_num_threads(settings.torch_threads)
+
             # Load model and tokenizer
             model_name = settings.sentiment_model
             logger.info(f"Loading model: {model_name}")
 
-            self.tokenizer = AutoTokenizer.from_pretrained(model_name)
-            self.model = AutoModelForSequenceClassification.from_pretrained(model_name)
+            # The Rust-backed fast tokenizer, never the pure-Python fallback
+            self.tokenizer = AutoTokenizer.from_pretrained(model_name, use_fast=True)
+
+            if settings.use_onnx and OPTIMUM_AVAILABLE:
+                # ONNX Runtime runs the fused graph without PyTorch's per-op dispatch
+                self.model = self._load_onnx_model(model_name)
+            else:
+                self.model = AutoModelForSequenceClassification.from_pretrained(model_name)
+
+                # Move model to device
+                self.model.to(self.device)
 
-            # Move model to device
-            self.model.to(self.device)
+                # Reduce precision to cut memory traffic per inference
+                self._apply_precision()
 
-            # Create pipeline for easier inference
-            self.classifier = pipeline(
-                "sentiment-analysis",
-                model=self.model,
-                tokenizer=self.tokenizer,
-                device=0 if self.device.type == "cuda" else -1,
-                return_all_scores=True
+                # CUDA graphs remove per-kernel launch overhead; CPU compilation tends to regress
+                if settings.use_compile and self.device.type == "cuda":
+                    self._compile_model()
+
+            if self.device.type == "cuda":
+                self.pinned = {
+                    key: torch.empty(
+                        settings.batch_size * settings.max_sequence_length, dtype=torch.long, pin_memory=True
+                    )
+                    for key in ('input_ids', 'attention_mask')
+                }
+
+            if self.compiled:
+                # Pay the compilation cost for every padded length up front
+                await asyncio.get_running_loop().run_in_executor(self.infer_pool, self._warm_up)
+
+            # Coalesce concurrent analyze_single calls into batched forward passes
+            self.batcher = MicroBatcher(
+                self._run_sorted_inference,
+                max_batch_size=settings.max_batch_size,
+                max_latency_ms=settings.max_latency_ms,
+                executor=self.infer_pool,
+                name="sentiment"
             )
+            self.batcher.start()
 
             logger.info("Sentiment Analysis Service initialized successfully")
 
         except Exception as e:
             logger.error(f"Failed to initialize Sentiment Analysis Service: {e}")
             logger.warning("Falling back to mock sentiment analysis")
-            self.classifier = None
+            self.model = None
+    
+    def _load_onnx_model(self, model_name: str):
+        """Load the model as an ONNX Runtime graph, exporting it on first use."""
+        # Same export directory as AdvancedSentimentService, so one export serves both
+        export_dir = os.path.join(settings.onnx_cache_dir, model_name.replace('/', '__'))
+        provider = "CUDAExecutionProvider" if self.device.type == "cuda" else "CPUExecutionProvider"
+
+        if os.path.exists(os.path.join(export_dir, "model.onnx")):
+            model = ORTModelForSequenceClassification.from_pretrained(export_dir, provider=provider)
+        else:
+            logger.info(f"Exporting {model_name} to ONNX in {export_dir}")
+            model = ORTModelForSequenceClassification.from_pretrained(model_name, export=True, provider=provider)
+            model.save_pretrained(export_dir)
+            self.tokenizer.save_pretrained(export_dir)
+
+        logger.info(f"Loaded ONNX Runtime model for {model_name} ({provider})")
+        return model
+    
+    def _apply_precision(self):
+        """Cast or quantize the model according to settings.sentiment_precision."""
+        precision = settings.sentiment_precision.lower()
+        if precision == "auto":
+            precision = "bf16" if self.device.type == "cuda" else "int8"
+
+        if precision == "bf16":
+            self.model = self.model.to(torch.bfloat16)
+            logger.info(f"Loaded {settings.sentiment_model} in bf16")
+        elif precision == "int8":
+            if self.device.type == "cuda":
+                # Dynamic quantization only has CPU kernels
+                logger.warning("int8 precision is only supported on CPU, keeping fp32")
+                return
+            self.model = torch.ao.quantization.quantize_dynamic(
+                self.model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+            logger.info(f"Quantized {settings.sentiment_model} to int8")
+        elif precision != "fp32":
+            logger.warning(f"Unknown sentiment precision '{precision}', keeping fp32")
+    
+    def _compile_model(self):
+        """Compile the model's forward pass with torch.compile."""
+        try:
+            self.model.forward = torch.compile(self.model.forward, mode="reduce-overhead")
+            self.compiled = True
+            logger.info(f"Compiled {settings.sentiment_model} with torch.compile")
+        except Exception as e:
+            logger.warning(f"torch.compile unavailable, running eagerly: {e}")
+    
+    def _warm_up(self):
+        """Run a full batch at every bucket length so compiled graphs exist before real traffic."""
+        texts = ["warmup"] * settings.batch_size
+        for bucket in SEQUENCE_BUCKETS:
+            if bucket > settings.max_sequence_length:
+                break
+            encoding = self.tokenizer(
+                texts, return_tensors="pt", padding='max_length', truncation=True, max_length=bucket
+            )
+            self._classify(encoding)
+        logger.info("Warmed up compiled sentiment model")
+    
+    def _padding_kwargs(self, texts: List[str]) -> Dict[str, Any]:
+        """Tokenizer arguments: truncate, then pad to the batch max or a fixed bucket when compiled."""
+        max_length = settings.max_sequence_length
+        if not self.compiled:
+            return {'padding': True, 'truncation': True, 'max_length': max_length}
+
+        lengths = [len(ids) for ids in self.tokenizer(texts, truncation=True, max_length=max_length)['input_ids']]
+        longest = max(lengths, default=0)
+        bucket = next((b for b in SEQUENCE_BUCKETS if longest <= b < max_length), max_length)
+
+        return {'padding': 'max_length', 'truncation': True, 'max_length': bucket}
     
     async def analyze_single(self, text: str) -> Dict[str, Any]:
         """Analyze sentiment for a single text."""
-        if not self.classifier:
+        if self.model is None:
             # Use mock sentiment analysis
             return self._mock_analyze_single(text)
 
@@ -86,96 +295,46 @@ class SentimentAnalysisService:
             # Clean and truncate text
             cleaned_text = self._clean_text(text)
 
-            # Run inference
-            results = await asyncio.get_event_loop().run_in_executor(
-                None, self._run_inference, cleaned_text
-            )
-
-            # Process results
-            sentiment_scores = {result['label'].lower(): result['score'] for result in results[0]}
+            # Run inference together with any other texts submitted meanwhile
+            scores = await self.batcher.submit(cleaned_text)
 
-            # Map labels to our standard format
-            label_mapping = {
-                'positive': 'positive',
-                'negative': 'negative',
-                'neutral': 'neutral',
-                'label_1': 'negative',  # DistilBERT uses LABEL_0/LABEL_1
-                'label_0': 'positive'
-            }
-
-            # Find the highest confidence sentiment
-            max_score = 0
-            predicted_sentiment = 'neutral'
-            confidence = 0.0
-
-            for label, score in sentiment_scores.items():
-                mapped_label = label_mapping.get(label.lower(), label.lower())
-                if score > max_score:
-                    max_score = score
-                    predicted_sentiment = mapped_label
-                    confidence = score
-
-            # If using binary classification (positive/negative), add neutral logic
-            if len(sentiment_scores) == 2 and confidence < 0.7:
-                predicted_sentiment = 'neutral'
-                confidence = 1.0 - confidence
-
-            return {
-                'sentiment': predicted_sentiment,
-                'confidence': float(confidence),
-                'all_scores': {k: float(v) for k, v in sentiment_scores.items()}
-            }
+            return self._interpret_scores(scores)
 
         except Exception as e:
             logger.error(f"Error analyzing sentiment for text: {e}")
             # Return neutral sentiment as fallback
-            return {
-                'sentiment': 'neutral',
-                'confidence': 0.5,
-                'all_scores': {'neutral': 0.5}
-            }
+            return fallback_result()
+
+    def _interpret_scores(self, results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Turn the classifier's per-label scores for one text into our result format."""
+        sentiment_scores = {result['label'].lower(): result['score'] for result in results}
+
+        # Find the highest confidence sentiment
+        max_score = 0
+        predicted_sentiment = 'neutral'
+        confidence = 0.0
+
+        for label, score in sentiment_scores.items():
+            mapped_label = LABEL_MAPPING.get(label, label)
+            if score > max_score:
+                max_score = score
+                predicted_sentiment = mapped_label
+                confidence = score
+
+        # If using binary classification (positive/negative), add neutral logic
+        if len(sentiment_scores) == 2 and confidence < 0.7:
+            predicted_sentiment = 'neutral'
+            confidence = 1.0 - confidence
 
-    def _mock_analyze_single(self, text: str) -> Dict[str, Any]:
-        """Mock sentiment analysis for demo purposes with multi-language support."""
-        # Detect language and analyze sentiment
-        language = self._detect_language(text)
-        text_lower = text.lower()
-
-        # Multi-language sentiment keywords
-        sentiment_keywords = {
-            'en': {
-                'positive': ['good', 'great', 'excellent', 'amazing', 'love', 'fantastic', 'awesome', 'perfect'],
-                'negative': ['bad', 'terrible', 'awful', 'hate', 'horrible', 'worst', 'disappointing', 'broken']
-            },
-            'es': {
-                'positive': ['bueno', 'excelente', 'increíble', 'amor', 'fantástico', 'perfecto'],
-                'negative': ['malo', 'terrible', 'horrible', 'odio', 'peor', 'decepcionante']
-            },
-            'fr': {
-                'positive': ['bon', 'excellent', 'incroyable', 'amour', 'fantastique', 'parfait'],
-                'negative': ['mauvais', 'terrible', 'horrible', 'haine', 'pire', 'décevant']
-            },
-            'de': {
-                'positive': ['gut', 'ausgezeichnet', 'erstaunlich', 'liebe', 'fantastisch', 'perfekt'],
-                'negative': ['schlecht', 'schrecklich', 'hass', 'schlimmste', 'enttäuschend']
-            }
+        return {
+            'sentiment': predicted_sentiment,
+            'confidence': float(confidence),
+            'all_scores': {k: float(v) for k, v in sentiment_scores.items()}
         }
 
-        # Use English as fallback
-        keywords = sentiment_keywords.get(language, sentiment_keywords['en'])
-
-        positive_count = sum(1 for word in keywords['positive'] if word in text_lower)
-        negative_count = sum(1 for word in keywords['negative'] if word in text_lower)
-
-        if positive_count > negative_count:
-            sentiment = 'positive'
-            confidence = min(0.9, 0.6 + (positive_count * 0.1))
-        elif negative_count > positive_count:
-            sentiment = 'negative'
-            confidence = min(0.9, 0.6 + (negative_count * 0.1))
-        else:
-            sentiment = 'neutral'
-            confidence = 0.7
+    def _mock_analyze_single(self, text: str) -> Dict[str, Any]:
+        """Mock sentiment analysis for demo purposes with multi-language support."""
+        sentiment, confidence, language = _mock_sentiment(text)
 
         return {
             'sentiment': sentiment,
@@ -186,33 +345,13 @@ class SentimentAnalysisService:
 
     def _detect_language(self, text: str) -> str:
         """Simple language detection based on common words."""
-        text_lower = text.lower()
-
-        # Language indicators
-        language_indicators = {
-            'es': ['el', 'la', 'de', 'que', 'y', 'en', 'un', 'es', 'se', 'no', 'te', 'lo', 'le', 'da', 'su', 'por', 'son', 'con', 'para'],
-            'fr': ['le', 'de', 'et', 'à', 'un', 'il', 'être', 'et', 'en', 'avoir', 'que', 'pour', 'dans', 'ce', 'son', 'une', 'sur', 'avec', 'ne', 'se'],
-            'de': ['der', 'die', 'und', 'in', 'den', 'von', 'zu', 'das', 'mit', 'sich', 'des', 'auf', 'für', 'ist', 'im', 'dem', 'nicht', 'ein', 'eine', 'als'],
-            'en': ['the', 'be', 'to', 'of', 'and', 'a', 'in', 'that', 'have', 'i', 'it', 'for', 'not', 'on', 'with', 'he', 'as', 'you', 'do', 'at']
-        }
-
-        # Count matches for each language
-        language_scores = {}
-        words = text_lower.split()
-
-        for lang, indicators in language_indicators.items():
-            score = sum(1 for word in words if word in indicators)
-            language_scores[lang] = score
-
-        # Return language with highest score, default to English
-        if language_scores:
-            detected_lang = max(language_scores, key=language_scores.get)
-            return detected_lang if language_scores[detected_lang] > 0 else 'en'
-
-        return 'en'
+        return _detect_language(text.lower().split())
     
     async def analyze_batch(self, data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Analyze sentiment for a batch of data."""
+        """Analyze sentiment for a batch of data.
+        
+        Results are written into the given dicts in place, and the same list is returned.
+        """
         if not data:
             return []
         
@@ -220,45 +359,34 @@ class SentimentAnalysisService:
         
         # Process in batches to avoid memory issues
         batch_size = settings.batch_size
-        analyzed_data = []
         
         for i in range(0, len(data), batch_size):
-            batch = data[i:i + batch_size]
-            batch_results = await self._process_batch(batch)
-            analyzed_data.extend(batch_results)
+            await self._process_batch(data[i:i + batch_size])
         
-        logger.info(f"Completed sentiment analysis for {len(analyzed_data)} items")
-        return analyzed_data
+        logger.info(f"Completed sentiment analysis for {len(data)} items")
+        return data
     
     async def _process_batch(self, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Process a single batch of data."""
-        tasks = []
-        
-        for item in batch:
-            task = self.analyze_single(item['content'])
-            tasks.append(task)
-        
-        # Run all analyses concurrently
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        # Combine results with original data
-        analyzed_batch = []
-        for i, (item, result) in enumerate(zip(batch, results)):
-            if isinstance(result, Exception):
-                logger.error(f"Error analyzing item {i}: {result}")
-                # Use fallback sentiment
-                result = {
-                    'sentiment': 'neutral',
-                    'confidence': 0.5,
-                    'all_scores': {'neutral': 0.5}
-                }
+        """Process a single batch of data with one classifier call."""
+        if self.model is None:
+            results = [self._mock_analyze_single(item['content']) for item in batch]
+        else:
+            texts = [self._clean_text(item['content']) for item in batch]
             
-            # Add sentiment analysis results to the original item
-            analyzed_item = item.copy()
-            analyzed_item.update(result)
-            analyzed_batch.append(analyzed_item)
+            try:
+                outputs = await asyncio.get_running_loop().run_in_executor(
+                    self.infer_pool, self._run_sorted_inference, texts
+                )
+                results = [self._interpret_scores(output) for output in outputs]
+            except Exception as e:
+                logger.error(f"Error analyzing batch of {len(texts)} items: {e}")
+                results = [fallback_result() for _ in texts]
         
-        return analyzed_batch
+        # Add sentiment analysis results to the original items in place
+        for item, result in zip(batch, results):
+            item.update(result)
+        
+        return batch
     
     def _clean_text(self, text: str) -> str:
         """Clean and preprocess text for analysis."""
@@ -276,26 +404,81 @@ class SentimentAnalysisService:
         
         return text
     
-    def _run_inference(self, text: str) -> List[Dict[str, Any]]:
-        """Run model inference (blocking operation)."""
-        return self.classifier(text)
+    def _run_sorted_inference(self, texts: List[str]) -> List[List[Dict[str, Any]]]:
+        """Run batched inference over texts sorted by length, returning scores in input order."""
+        # Similar lengths side by side keep padding within each model batch small
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        outputs = self._run_batch_inference([texts[i] for i in order])
+
+        results = [None] * len(texts)
+        for i, output in zip(order, outputs):
+            results[i] = output
+        return results
+    
+    def _run_batch_inference(self, texts: List[str]) -> List[List[Dict[str, Any]]]:
+        """Run model inference over many texts in padded batches (blocking operation).
+
+        Texts arrive sorted by length. A batch ends at ``batch_size`` texts or
+        where the estimated length bucket changes, so short texts are never
+        padded out to a long neighbour's length.
+        """
+        batch_size = settings.batch_size
+        results = []
+        start = 0
+        while start < len(texts):
+            bucket = length_bucket(texts[start])
+            end = start + 1
+            while end < len(texts) and end - start < batch_size and length_bucket(texts[end]) == bucket:
+                end += 1
+
+            chunk = texts[start:end]
+            encoding = self.tokenizer(chunk, return_tensors="pt", **self._padding_kwargs(chunk))
+            results.extend(self._classify(encoding))
+            start = end
+        return results
+    
+    def _to_device(self, encoding: Dict[str, Any]) -> Dict[str, Any]:
+        """Move tokenized inputs to the model device, staging GPU copies through pinned memory."""
+        if self.pinned is None:
+            return {key: value.to(self.device) for key, value in encoding.items()}
+
+        # Only one inference thread runs, and it waits for each forward pass to
+        # finish, so a buffer is never overwritten while its copy is in flight
+        tensors = {}
+        for key, value in encoding.items():
+            buffer = self.pinned.get(key)
+            if buffer is None or value.numel() > buffer.numel():
+                tensors[key] = value.to(self.device)
+                continue
+            staging = buffer[:value.numel()].view(value.shape)
+            staging.copy_(value)
+            tensors[key] = staging.to(self.device, non_blocking=True)
+        return tensors
+    
+    def _classify(self, encoding: Dict[str, Any]) -> List[List[Dict[str, Any]]]:
+        """Run a model forward pass and return per-text label scores like the pipeline does."""
+        encoding = self._to_device(encoding)
+        with torch.inference_mode():
+            logits = self.model(**encoding).logits
+        probabilities = logits.float().softmax(dim=-1).cpu().tolist()
+        id2label = self.model.config.id2label
+
+        return [
+            [{'label': id2label[i], 'score': score} for i, score in enumerate(row)]
+            for row in probabilities
+        ]
     
     async def get_sentiment_distribution(self, data: List[Dict[str, Any]]) -> Dict[str, float]:
         """Calculate sentiment distribution for a dataset."""
         if not data:
             return {'positive': 0.0, 'negative': 0.0, 'neutral': 0.0}
         
-        sentiment_counts = {'positive': 0, 'negative': 0, 'neutral': 0}
-        
-        for item in data:
-            sentiment = item.get('sentiment', 'neutral')
-            if sentiment in sentiment_counts:
-                sentiment_counts[sentiment] += 1
+        sentiment_counts = Counter(item.get('sentiment', 'neutral') for item in data)
         
         total = len(data)
         return {
-            sentiment: (count / total) * 100 
-            for sentiment, count in sentiment_counts.items()
+            sentiment: (sentiment_counts.get(sentiment, 0) / total) * 100
+            for sentiment in ('positive', 'negative', 'neutral')
         }
     
     async def filter_by_sentiment(self, data: List[Dict[str, Any]], 
@@ -318,13 +501,15 @@ class SentimentAnalysisService:
     
     async def cleanup(self):
         """Cleanup resources."""
+        if self.batcher:
+            await self.batcher.stop()
+            self.batcher = None
+        self.infer_pool.shutdown(wait=False)
+
         # Clear model from memory
-        if self.model:
-            del self.model
-        if self.tokenizer:
-            del self.tokenizer
-        if self.classifier:
-            del self.classifier
+        self.model = None
+        self.tokenizer = None
+        self.pinned = None
         
         # Clear CUDA cache if using GPU
         if torch.cuda.is_available():
@@ -5,13 +5,18 @@ Extract trending topics and themes from brand mentions using BERTopic and KeyBER
 
 import asyncio
 import logging
-from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from functools import partial
 from typing import Dict, List, Any, Optional
 import json
 import aiosqlite
-from collections import Counter
+import numpy as np
 
+from .caching import TTLCache
 from .config import settings
+from .database import epoch_seconds, open_connection
 
 logger = logging.getLogger(__name__)
 
@@ -19,12 +24,74 @@ logger = logging.getLogger(__name__)
 try:
     from bertopic import BERTopic
     from keybert import KeyBERT
+    from sentence_transformers import SentenceTransformer
     from sklearn.feature_extraction.text import CountVectorizer
     TOPIC_MODELING_AVAILABLE = True
 except ImportError:
     TOPIC_MODELING_AVAILABLE = False
     logger.warning("Topic modeling libraries not available, using mock implementation")
 
+# Sentence embedding model shared by BERTopic and the per-post embedding store
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+
+# Post ids per IN (...) lookup, below SQLite's bound-parameter limit
+EMBEDDING_LOOKUP_CHUNK = 500
+
+# Posts are keyed by a content hash, so an embedding never goes stale;
+# stored as float16 to halve the blob size
+_SQL_CREATE_POST_EMBEDDINGS = """
+    CREATE TABLE IF NOT EXISTS post_embeddings (
+        post_id TEXT PRIMARY KEY,
+        embedding BLOB NOT NULL
+    )
+"""
+
+_SQL_INSERT_EMBEDDING = """
+    INSERT OR REPLACE INTO post_embeddings (post_id, embedding) VALUES (?, ?)
+"""
+
+# Cheap fingerprint of the posts in a time window: newest post and count
+_SQL_POSTS_SIGNATURE = """
+    SELECT MAX(ts_epoch), COUNT(*) FROM posts
+    WHERE ts_epoch > strftime('%s', 'now') - ?
+"""
+
+# SQL kept as module constants so repeated calls hit the prepared-statement cache
+_SQL_RECENT_POSTS = """
+    SELECT id, content, sentiment_score, ts_epoch
+    FROM posts 
+    WHERE ts_epoch > strftime('%s', 'now') - ?
+    ORDER BY ts_epoch DESC
+"""
+
+_SQL_INSERT_TOPIC = """
+    INSERT INTO topics 
+    (topic_id, keywords, representative_docs, timestamp, doc_count, avg_sentiment, sentiment_distribution, ts_epoch)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+_SQL_TRENDING_TOPICS = """
+    SELECT topic_id, keywords, doc_count, avg_sentiment, sentiment_distribution, ts_epoch
+    FROM topics 
+    WHERE ts_epoch > strftime('%s', 'now') - ?
+    ORDER BY doc_count DESC, ts_epoch DESC
+    LIMIT ?
+"""
+
+
+@dataclass(slots=True)
+class RecentPosts:
+    """Posts in a time window as parallel columns, newest first."""
+    ids: List[str]
+    contents: List[str]
+    # posts.sentiment_score per post, NaN where the post is not analyzed yet
+    sentiments: np.ndarray
+    # posts.ts_epoch per post
+    timestamps: np.ndarray
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+
 
 class TopicModelingService:
     """Service for extracting and analyzing topics from brand mentions."""
@@ -33,6 +100,13 @@ class TopicModelingService:
         self.db_path = "echosense.db"
         self.topic_model = None
         self.keyword_model = None
+        self.encoder = None
+        # Encoding and fitting each saturate the cores on their own, so they run one at a time
+        self.fit_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="topics")
+        self.db: Optional[aiosqlite.Connection] = None
+        self.db_lock = asyncio.Lock()
+        # Results keyed by (window, newest post, post count), so a refit only happens when posts change
+        self.topic_cache = TTLCache(ttl=settings.topic_cache_ttl, maxsize=8)
         
     async def initialize(self):
         """Initialize topic modeling service."""
@@ -42,6 +116,9 @@ class TopicModelingService:
             await self.init_topics_database()
             
             if TOPIC_MODELING_AVAILABLE:
+                # Documents are encoded once here and the embeddings passed to BERTopic
+                self.encoder = SentenceTransformer(EMBEDDING_MODEL)
+                
                 # Initialize BERTopic model
                 vectorizer_model = CountVectorizer(
                     ngram_range=(1, 2), 
@@ -51,6 +128,7 @@ class TopicModelingService:
                 )
                 
                 self.topic_model = BERTopic(
+                    embedding_model=self.encoder,
                     vectorizer_model=vectorizer_model,
                     min_topic_size=3,
                     nr_topics="auto"
@@ -70,43 +148,81 @@ class TopicModelingService:
             logger.warning("Falling back to mock implementation")
             self.topic_model = None
             self.keyword_model = None
+            self.encoder = None
+    
+    async def get_db(self) -> aiosqlite.Connection:
+        """Return the shared database connection, opening it on first use."""
+        async with self.db_lock:
+            if self.db is None:
+                self.db = await open_connection(self.db_path)
+        return self.db
     
     async def init_topics_database(self):
         """Initialize topics database tables."""
-        async with aiosqlite.connect(self.db_path) as db:
-            # Topics table
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS topics (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    topic_id INTEGER NOT NULL,
-                    keywords TEXT NOT NULL,
-                    representative_docs TEXT,
-                    timestamp DATETIME NOT NULL,
-                    doc_count INTEGER DEFAULT 0,
-                    avg_sentiment REAL DEFAULT 0.0,
-                    sentiment_distribution TEXT
-                )
-            """)
-            
-            # Topic assignments table
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS post_topics (
-                    post_id TEXT NOT NULL,
-                    topic_id INTEGER NOT NULL,
-                    confidence REAL DEFAULT 0.0,
-                    timestamp DATETIME NOT NULL,
-                    PRIMARY KEY (post_id, topic_id),
-                    FOREIGN KEY (post_id) REFERENCES posts (id)
-                )
-            """)
-            
-            await db.execute("CREATE INDEX IF NOT EXISTS idx_topics_timestamp ON topics(timestamp)")
-            await db.execute("CREATE INDEX IF NOT EXISTS idx_post_topics_topic_id ON post_topics(topic_id)")
-            
+        db = await self.get_db()
+        # Topics table
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS topics (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                topic_id INTEGER NOT NULL,
+                keywords TEXT NOT NULL,
+                representative_docs TEXT,
+                timestamp DATETIME NOT NULL,
+                doc_count INTEGER DEFAULT 0,
+                avg_sentiment REAL DEFAULT 0.0,
+                sentiment_distribution TEXT,
+                ts_epoch INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        await self.migrate_topics_table(db)
+        
+        # Topic assignments table
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS post_topics (
+                post_id TEXT NOT NULL,
+                topic_id INTEGER NOT NULL,
+                confidence REAL DEFAULT 0.0,
+                timestamp DATETIME NOT NULL,
+                PRIMARY KEY (post_id, topic_id),
+                FOREIGN KEY (post_id) REFERENCES posts (id)
+            )
+        """)
+        
+        await db.execute(_SQL_CREATE_POST_EMBEDDINGS)
+        
+        # Integer key so the trending window is a plain index range scan
+        await db.execute("CREATE INDEX IF NOT EXISTS idx_topics_epoch ON topics(ts_epoch)")
+        await db.execute("DROP INDEX IF EXISTS idx_topics_timestamp")
+        await db.execute("CREATE INDEX IF NOT EXISTS idx_post_topics_topic_id ON post_topics(topic_id)")
+        
+        await db.commit()
+    
+    async def migrate_topics_table(self, db):
+        """Bring a topics table created by an older version up to the current schema."""
+        cursor = await db.execute("PRAGMA table_info(topics)")
+        columns = {column[1] for column in await cursor.fetchall()}
+        
+        if 'ts_epoch' not in columns:
+            await db.execute("ALTER TABLE topics ADD COLUMN ts_epoch INTEGER NOT NULL DEFAULT 0")
+            await db.execute("UPDATE topics SET ts_epoch = CAST(strftime('%s', timestamp) AS INTEGER)")
             await db.commit()
+            logger.info("Backfilled topics.ts_epoch from topics.timestamp")
     
     async def extract_topics(self, time_window_hours: int = 24) -> Dict[str, Any]:
-        """Extract topics from recent posts."""
+        """Extract topics from recent posts, reusing the last result while those posts are unchanged."""
+        try:
+            db = await self.get_db()
+            (signature,) = await db.execute_fetchall(_SQL_POSTS_SIGNATURE, (int(time_window_hours) * 3600,))
+        except Exception as e:
+            logger.error(f"Error reading posts signature: {e}")
+            return await self._extract_topics(time_window_hours)
+        
+        return await self.topic_cache.get_or_compute(
+            (time_window_hours, *signature), lambda: self._extract_topics(time_window_hours)
+        )
+    
+    async def _extract_topics(self, time_window_hours: int) -> Dict[str, Any]:
+        """Fit the topic model on recent posts and store the topics found."""
         try:
             # Get recent posts
             posts = await self.get_recent_posts(time_window_hours)
@@ -118,40 +234,48 @@ class TopicModelingService:
             if not TOPIC_MODELING_AVAILABLE or not self.topic_model:
                 return await self.mock_topic_extraction(posts)
             
-            # Extract text content
-            documents = [post['content'] for post in posts]
+            documents = posts.contents
+            
+            # Only posts not seen by an earlier run need encoding
+            embeddings = await self.get_embeddings(posts)
             
             # Fit topic model
-            topics, probabilities = await asyncio.get_event_loop().run_in_executor(
-                None, self.topic_model.fit_transform, documents
+            topics, probabilities = await asyncio.get_running_loop().run_in_executor(
+                self.fit_pool, partial(self.topic_model.fit_transform, documents, embeddings=embeddings)
             )
             
             # Get topic information
             topic_info = self.topic_model.get_topic_info()
             
+            # Group post indices by topic in one pass; the stable sort keeps
+            # each topic's posts newest first
+            topics = np.asarray(topics)
+            order = np.argsort(topics, kind='stable')
+            topic_ids, starts = np.unique(topics[order], return_index=True)
+            idx_by_topic = dict(zip(topic_ids.tolist(), np.split(order, starts[1:])))
+            
             # Process topics
             extracted_topics = []
-            for _, row in topic_info.iterrows():
-                if row['Topic'] == -1:  # Skip outlier topic
+            for topic_id in topic_info['Topic'].tolist():
+                if topic_id == -1:  # Skip outlier topic
                     continue
                 
-                topic_id = int(row['Topic'])
                 keywords = self.topic_model.get_topic(topic_id)
                 
                 # Get posts assigned to this topic
-                topic_posts = [posts[i] for i, t in enumerate(topics) if t == topic_id]
+                topic_idx = idx_by_topic.get(topic_id, order[:0])
                 
                 # Calculate sentiment distribution for this topic
-                sentiment_dist = self.calculate_topic_sentiment(topic_posts)
+                sentiment_dist = self.calculate_topic_sentiment(posts.sentiments[topic_idx])
                 
                 extracted_topics.append({
                     'topic_id': topic_id,
                     'keywords': [word for word, _ in keywords[:10]],  # Top 10 keywords
                     'keyword_scores': dict(keywords[:10]),
-                    'doc_count': len(topic_posts),
+                    'doc_count': len(topic_idx),
                     'avg_sentiment': sentiment_dist['avg_sentiment'],
                     'sentiment_distribution': sentiment_dist['distribution'],
-                    'representative_docs': [post['content'][:200] for post in topic_posts[:3]]
+                    'representative_docs': [documents[i][:200] for i in topic_idx[:3]]
                 })
             
             # Store topics in database
@@ -168,108 +292,121 @@ class TopicModelingService:
             logger.error(f"Error extracting topics: {e}")
             return await self.mock_topic_extraction([])
     
-    async def get_recent_posts(self, hours: int) -> List[Dict[str, Any]]:
+    async def get_recent_posts(self, hours: int) -> RecentPosts:
         """Get recent posts for topic modeling."""
-        async with aiosqlite.connect(self.db_path) as db:
-            since = datetime.utcnow() - timedelta(hours=hours)
-            cursor = await db.execute("""
-                SELECT id, content, sentiment, timestamp
-                FROM posts 
-                WHERE timestamp > ? AND content IS NOT NULL
-                ORDER BY timestamp DESC
-            """, (since,))
-            
-            rows = await cursor.fetchall()
+        db = await self.get_db()
+        rows = await db.execute_fetchall(_SQL_RECENT_POSTS, (int(hours) * 3600,))
+        if not rows:
+            return RecentPosts([], [], np.empty(0, dtype=np.float64), np.empty(0, dtype=np.int64))
+        
+        # Transpose rows into columns in one C-level pass instead of a dict per row
+        ids, contents, sentiments, timestamps = zip(*rows)
+        return RecentPosts(
+            ids=list(ids),
+            contents=list(contents),
+            sentiments=np.array(sentiments, dtype=np.float64),  # None becomes NaN
+            timestamps=np.array(timestamps, dtype=np.int64)
+        )
+    
+    async def get_embeddings(self, posts: RecentPosts) -> np.ndarray:
+        """Sentence embeddings for posts in order, encoding and storing only those not stored yet."""
+        db = await self.get_db()
+        post_ids = posts.ids
+        
+        stored: Dict[str, np.ndarray] = {}
+        for start in range(0, len(post_ids), EMBEDDING_LOOKUP_CHUNK):
+            chunk = post_ids[start:start + EMBEDDING_LOOKUP_CHUNK]
+            rows = await db.execute_fetchall(
+                f"SELECT post_id, embedding FROM post_embeddings WHERE post_id IN ({','.join('?' * len(chunk))})", chunk
+            )
+            for post_id, blob in rows:
+                stored[post_id] = np.frombuffer(blob, dtype=np.float16)
+        
+        missing = [i for i, post_id in enumerate(post_ids) if post_id not in stored]
+        if missing:
+            # encode() length-sorts internally, so batches carry little padding
+            encoded = await asyncio.get_running_loop().run_in_executor(self.fit_pool, partial(
+                self.encoder.encode,
+                [posts.contents[i] for i in missing],
+                batch_size=64,
+                convert_to_numpy=True,
+                show_progress_bar=False
+            ))
+            encoded = encoded.astype(np.float16)
             
-            posts = []
-            for row in rows:
-                posts.append({
-                    'id': row[0],
-                    'content': row[1],
-                    'sentiment': row[2],
-                    'timestamp': datetime.fromisoformat(row[3]) if isinstance(row[3], str) else row[3]
-                })
+            await db.executemany(_SQL_INSERT_EMBEDDING, [
+                (post_ids[i], embedding.tobytes()) for i, embedding in zip(missing, encoded)
+            ])
+            await db.commit()
             
-            return posts
-    
-    def calculate_topic_sentiment(self, posts: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Calculate sentiment distribution for a topic."""
-        if not posts:
-            return {'avg_sentiment': 0.0, 'distribution': {'positive': 0, 'negative': 0, 'neutral': 0}}
+            for i, embedding in zip(missing, encoded):
+                stored[post_ids[i]] = embedding
+            logger.info(f"Encoded {len(missing)} new posts, reused {len(post_ids) - len(missing)} stored embeddings")
         
-        sentiments = [post['sentiment'] for post in posts if post['sentiment']]
+        return np.stack([stored[post_id] for post_id in post_ids]).astype(np.float32)
+    
+    def calculate_topic_sentiment(self, sentiments: np.ndarray) -> Dict[str, Any]:
+        """Calculate sentiment distribution for a topic from its posts' sentiment scores."""
+        scores = sentiments[~np.isnan(sentiments)]
+        total = scores.size
         
-        if not sentiments:
+        if not total:
             return {'avg_sentiment': 0.0, 'distribution': {'positive': 0, 'negative': 0, 'neutral': 0}}
         
-        # Count sentiment distribution
-        sentiment_counts = Counter(sentiments)
-        total = len(sentiments)
+        # Scores are -1, 0, +1, so shifting by one gives bincount slots negative, neutral, positive
+        negative, neutral, positive = np.bincount(scores.astype(np.intp) + 1, minlength=3).tolist()
         
         distribution = {
-            'positive': (sentiment_counts.get('positive', 0) / total) * 100,
-            'negative': (sentiment_counts.get('negative', 0) / total) * 100,
-            'neutral': (sentiment_counts.get('neutral', 0) / total) * 100
+            'positive': (positive / total) * 100,
+            'negative': (negative / total) * 100,
+            'neutral': (neutral / total) * 100
         }
         
-        # Calculate average sentiment score
-        sentiment_scores = {'positive': 1, 'neutral': 0, 'negative': -1}
-        avg_sentiment = sum(sentiment_scores.get(s, 0) for s in sentiments) / len(sentiments)
-        
         return {
-            'avg_sentiment': avg_sentiment,
+            'avg_sentiment': float(scores.mean()),
             'distribution': distribution
         }
     
     async def store_topics(self, topics: List[Dict[str, Any]]):
         """Store extracted topics in database."""
-        async with aiosqlite.connect(self.db_path) as db:
-            timestamp = datetime.utcnow()
-            
-            for topic in topics:
-                await db.execute("""
-                    INSERT INTO topics 
-                    (topic_id, keywords, representative_docs, timestamp, doc_count, avg_sentiment, sentiment_distribution)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    topic['topic_id'],
-                    json.dumps(topic['keywords']),
-                    json.dumps(topic['representative_docs']),
-                    timestamp,
-                    topic['doc_count'],
-                    topic['avg_sentiment'],
-                    json.dumps(topic['sentiment_distribution'])
-                ))
-            
-            await db.commit()
+        db = await self.get_db()
+        timestamp = datetime.utcnow()
+        ts_epoch = epoch_seconds(timestamp)
+        
+        # One statement and one transaction for the whole set of topics
+        await db.executemany(_SQL_INSERT_TOPIC, [
+            (
+                topic['topic_id'],
+                json.dumps(topic['keywords']),
+                json.dumps(topic['representative_docs']),
+                timestamp,
+                topic['doc_count'],
+                topic['avg_sentiment'],
+                json.dumps(topic['sentiment_distribution']),
+                ts_epoch
+            )
+            for topic in topics
+        ])
+        await db.commit()
     
     async def get_trending_topics(self, limit: int = 10) -> List[Dict[str, Any]]:
         """Get current trending topics."""
-        async with aiosqlite.connect(self.db_path) as db:
-            # Get topics from last 24 hours
-            since = datetime.utcnow() - timedelta(hours=24)
-            cursor = await db.execute("""
-                SELECT topic_id, keywords, doc_count, avg_sentiment, sentiment_distribution, timestamp
-                FROM topics 
-                WHERE timestamp > ?
-                ORDER BY doc_count DESC, timestamp DESC
-                LIMIT ?
-            """, (since, limit))
-            
-            rows = await cursor.fetchall()
-            
-            topics = []
-            for row in rows:
-                topics.append({
-                    'topic_id': row[0],
-                    'keywords': json.loads(row[1]),
-                    'doc_count': row[2],
-                    'avg_sentiment': row[3],
-                    'sentiment_distribution': json.loads(row[4]),
-                    'timestamp': datetime.fromisoformat(row[5]) if isinstance(row[5], str) else row[5]
-                })
-            
-            return topics
+        db = await self.get_db()
+        # Get topics from last 24 hours
+        rows = await db.execute_fetchall(_SQL_TRENDING_TOPICS, (24 * 3600, limit))
+        
+        topics = []
+        for row in rows:
+            topics.append({
+                'topic_id': row[0],
+                'keywords': json.loads(row[1]),
+                'doc_count': row[2],
+                'avg_sentiment': row[3],
+                'sentiment_distribution': json.loads(row[4]),
+                'timestamp': datetime.utcfromtimestamp(row[5])
+            })
+        
+        return topics
     
     async def mock_topic_extraction(self, posts: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Mock topic extraction for demo purposes."""
@@ -314,4 +451,9 @@ class TopicModelingService:
         """Cleanup resources."""
         self.topic_model = None
         self.keyword_model = None
+        self.encoder = None
+        self.fit_pool.shutdown(wait=False)
+        if self.db:
+            await self.db.close()
+            self.db = None
         logger.info("Topic Modeling Service cleaned up")
@@ -6,12 +6,18 @@ Main entry point for the EchoSense backend application.
 
 import asyncio
 import logging
+import logging.config
 import sys
 from pathlib import Path
 
 import uvicorn
 from dotenv import load_dotenv
 
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
 # Add the backend directory to the Python path
 backend_dir = Path(__file__).parent / "backend"
 sys.path.insert(0, str(backend_dir))
@@ -20,18 +26,11 @@ sys.path.insert(0, str(backend_dir))
 load_dotenv()
 
 from backend.config import settings
-from backend.main import app
-
-# Configure logging
-logging.basicConfig(
-    level=getattr(logging, settings.log_level.upper()),
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler("echosense.log")
-    ]
-)
+from backend.logging_setup import log_config
+from backend.main import MONITOR_LOCK_SUPPORTED, app
 
+# Logging is configured under __main__ only: uvicorn worker processes re-import
+# this module and configure their own queue and listener from log_config
 logger = logging.getLogger(__name__)
 
 
@@ -49,7 +48,11 @@ async def main():
         port=settings.backend_port,
         log_level=settings.log_level.lower(),
         reload=settings.environment == "development",
-        access_log=True,
+        loop="uvloop" if uvloop else "asyncio",
+        http="httptools",
+        access_log=settings.access_log,
+        # Leave uvicorn's loggers unconfigured so they propagate to the queue
+        log_config=None,
     )
     
     server = uvicorn.Server(config)
@@ -63,9 +66,36 @@ async def main():
         raise
 
 
+def run_workers():
+    """Serve from several worker processes; background monitoring runs in only one of them."""
+    if not MONITOR_LOCK_SUPPORTED:
+        raise RuntimeError("Multiple workers need file locking to run monitoring once; set WORKERS=1")
+    
+    logger.info(f"Starting EchoSense Backend Server with {settings.workers} workers...")
+    uvicorn.run(
+        "backend.main:app",
+        host="0.0.0.0",
+        port=settings.backend_port,
+        workers=settings.workers,
+        log_level=settings.log_level.lower(),
+        loop="uvloop" if uvloop else "asyncio",
+        http="httptools",
+        access_log=settings.access_log,
+        # Applied again inside each worker, which starts its own log listener
+        log_config=log_config(settings.log_level),
+    )
+
+
 if __name__ == "__main__":
+    logging.config.dictConfig(log_config(settings.log_level))
     try:
-        asyncio.run(main())
+        if settings.workers > 1 and settings.environment != "development":
+            run_workers()
+        else:
+            if uvloop:
+                # asyncio.run below then drives the server on libuv
+                asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+            asyncio.run(main())
     except KeyboardInterrupt:
         logger.info("Application interrupted by user")
     except Exception as e:
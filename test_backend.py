@@ -3,6 +3,8 @@
 Simple test script to verify backend imports and basic functionality.
 """
 
+import importlib
+import importlib.util
 import sys
 import os
 from pathlib import Path
@@ -11,6 +13,17 @@ from pathlib import Path
 backend_dir = Path(__file__).parent / "backend"
 sys.path.insert(0, str(backend_dir))
 
+# (module, label) located without running them; backend.main imports them all below
+MODULES = (
+    ("backend.data_ingestion", "Data ingestion module"),
+    ("backend.sentiment_analysis", "Sentiment analysis module"),
+    ("backend.forecasting", "Forecasting module"),
+    ("backend.ai_agent", "AI agent module"),
+)
+
+# The one real import: wiring up the app exercises the whole backend graph
+APP_MODULE = "backend.main"
+
 def test_imports():
     """Test if all backend modules can be imported."""
     print("Testing backend imports...")
@@ -25,42 +38,23 @@ def test_imports():
         print(f"✗ Config import failed: {e}")
         return False
     
-    try:
-        from backend.data_ingestion import DataIngestionService
-        print("✓ Data ingestion module imported successfully")
-    except Exception as e:
-        print(f"✗ Data ingestion import failed: {e}")
-        return False
-    
-    try:
-        from backend.sentiment_analysis import SentimentAnalysisService
-        print("✓ Sentiment analysis module imported successfully")
-    except Exception as e:
-        print(f"✗ Sentiment analysis import failed: {e}")
-        return False
+    failures = []
+    for module_name, label in MODULES:
+        if importlib.util.find_spec(module_name) is not None:
+            print(f"✓ {label} found")
+        else:
+            failures.append((label, f"{module_name} not found"))
     
     try:
-        from backend.forecasting import ForecastingService
-        print("✓ Forecasting module imported successfully")
-    except Exception as e:
-        print(f"✗ Forecasting import failed: {e}")
-        return False
-    
-    try:
-        from backend.ai_agent import AIAgentService
-        print("✓ AI agent module imported successfully")
-    except Exception as e:
-        print(f"✗ AI agent import failed: {e}")
-        return False
-    
-    try:
-        from backend.main import app
+        importlib.import_module(APP_MODULE).app
         print("✓ Main FastAPI app imported successfully")
     except Exception as e:
-        print(f"✗ Main app import failed: {e}")
-        return False
+        failures.append(("Main FastAPI app", e))
+    
+    for label, error in failures:
+        print(f"✗ {label} import failed: {error}")
     
-    return True
+    return not failures
 
 def main():
     """Main test function."""